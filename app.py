@@ -17,6 +17,8 @@ import json
 import os
 from typing import Dict, List, Optional
 
+from data_loading import load_df
+
 # Configuração da página
 st.set_page_config(
     page_title="NFL Fantasy Analytics",
@@ -161,11 +163,11 @@ def load_data():
     data_dir = ""
     
     try:
-        # Carregar dados consolidados
-        df = pd.read_csv(f"{data_dir}consolidated_fantasy_data.csv")
-        
+        # Carregar dados consolidados (engine pyarrow + dtypes explícitos)
+        df = load_df(f"{data_dir}consolidated_fantasy_data.csv")
+
         # Carregar dados de times
-        teams_df = pd.read_csv(f"{data_dir}team_data.csv")
+        teams_df = load_df(f"{data_dir}team_data.csv")
         
         # Carregar resumo
         with open(f"{data_dir}data_summary.json", 'r') as f:
@@ -325,7 +327,8 @@ def create_player_profile(df: pd.DataFrame, teams_df: pd.DataFrame):
     st.markdown("## 👤 Perfil do Jogador")
     
     # Seletor de jogador
-    players = df.groupby(['player_display_name', 'position', 'recent_team']).agg({
+    players = df.groupby(['player_display_name', 'position', 'recent_team'],
+                         observed=True, sort=False).agg({
         'fantasy_points_ppr': 'sum',
         'season': 'max'
     }).reset_index()
@@ -510,7 +513,8 @@ def main():
                 st.markdown(f"#### {position}")
                 
                 # Top 10 jogadores da posição
-                top_players = pos_data.groupby(['player_display_name', 'recent_team']).agg({
+                top_players = pos_data.groupby(['player_display_name', 'recent_team'],
+                                               observed=True, sort=False).agg({
                     'fantasy_points_ppr': 'sum',
                     'fantasy_points': 'sum'
                 }).reset_index().sort_values('fantasy_points_ppr', ascending=False).head(10)
@@ -538,7 +542,9 @@ def main():
         st.markdown("### 📈 Análise de Tendências")
         
         # Tendências por temporada
-        season_trends = filtered_df.groupby(['season', 'position']).agg({
+        # observed=True: posições desmarcadas no filtro não viram linhas
+        # vazias na legenda (mantém o sort padrão — a linha segue as temporadas)
+        season_trends = filtered_df.groupby(['season', 'position'], observed=True).agg({
             'fantasy_points_ppr': 'mean'
         }).reset_index()
         
@@ -6,9 +6,13 @@ Script corrigido para coletar dados históricos da NFL (2010-2024)
 import nfl_data_py as nfl
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import gc
 import os
 
+from data_loading import load_df
+
 def clean_data_types(df):
     """Limpa tipos de dados problemáticos"""
     
@@ -41,53 +45,77 @@ def collect_historical_data():
     os.makedirs(data_dir, exist_ok=True)
     
     try:
-        # 1. Coletar dados semanais (principal para fantasy)
-        print(f"\n📈 1. Coletando dados semanais...")
-        weekly_data = nfl.import_weekly_data(years=years)
-        print(f"   ✅ Dados semanais: {weekly_data.shape}")
-        
+        # Disparar os 4 downloads independentes em paralelo: trabalho de rede,
+        # o tempo total vira o do download mais lento em vez da soma dos quatro
+        print(f"\n⬇️ Iniciando downloads em paralelo (semanais, temporada, times, rosters)...")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                'weekly': executor.submit(nfl.import_weekly_data, years=years),
+                'seasonal': executor.submit(nfl.import_seasonal_data, years=years, s_type='REG'),
+                'teams': executor.submit(nfl.import_team_desc),
+                'rosters': executor.submit(nfl.import_seasonal_rosters, years=years),
+            }
+
+            # 1. Coletar dados semanais (principal para fantasy)
+            print(f"\n📈 1. Coletando dados semanais...")
+            weekly_data = futures['weekly'].result()
+            print(f"   ✅ Dados semanais: {weekly_data.shape}")
+
+            # 2. Coletar dados de temporada
+            print(f"\n📊 2. Coletando dados de temporada...")
+            seasonal_data = futures['seasonal'].result()
+            print(f"   ✅ Dados de temporada: {seasonal_data.shape}")
+
+            # 3. Coletar informações de times
+            print(f"\n🏟️ 3. Coletando informações de times...")
+            team_data = futures['teams'].result()
+            print(f"   ✅ Dados de times: {team_data.shape}")
+
+            # 4. Coletar rosters históricos
+            print(f"\n👥 4. Coletando rosters históricos...")
+            roster_data = futures['rosters'].result()
+            print(f"   ✅ Dados de rosters: {roster_data.shape}")
+
         # Filtrar apenas posições de fantasy
         fantasy_positions = ['QB', 'RB', 'WR', 'TE']
         weekly_fantasy = weekly_data[weekly_data['position'].isin(fantasy_positions)].copy()
         print(f"   🎯 Dados de fantasy: {weekly_fantasy.shape}")
-        
-        # Salvar dados semanais como CSV (mais compatível)
-        weekly_fantasy.to_csv(f"{data_dir}/weekly_fantasy_data.csv", index=False)
-        print(f"   💾 Salvos em: weekly_fantasy_data.csv")
-        
-        # 2. Coletar dados de temporada
-        print(f"\n📊 2. Coletando dados de temporada...")
-        seasonal_data = nfl.import_seasonal_data(years=years, s_type='REG')
-        print(f"   ✅ Dados de temporada: {seasonal_data.shape}")
-        
+
+        # Liberar o frame completo: só o recorte de fantasy segue em uso
+        del weekly_data
+        gc.collect()
+
+        # Salvar dados semanais como Parquet (colunar, muito mais rápido que CSV)
+        weekly_fantasy.to_parquet(f"{data_dir}/weekly_fantasy_data.parquet",
+                                  engine='pyarrow', compression='zstd', index=False)
+        print(f"   💾 Salvos em: weekly_fantasy_data.parquet")
+
         # Salvar dados de temporada
-        seasonal_data.to_csv(f"{data_dir}/seasonal_data.csv", index=False)
-        print(f"   💾 Salvos em: seasonal_data.csv")
-        
-        # 3. Coletar informações de times
-        print(f"\n🏟️ 3. Coletando informações de times...")
-        team_data = nfl.import_team_desc()
-        print(f"   ✅ Dados de times: {team_data.shape}")
-        
-        # Salvar dados de times
+        seasonal_data.to_parquet(f"{data_dir}/seasonal_data.parquet",
+                                 engine='pyarrow', compression='zstd', index=False)
+        print(f"   💾 Salvos em: seasonal_data.parquet")
+
+        # Salvar dados de times (CSV pequeno mantido para compatibilidade:
+        # o app lê team_data.csv)
+        team_data.to_parquet(f"{data_dir}/team_data.parquet",
+                             engine='pyarrow', compression='zstd', index=False)
         team_data.to_csv(f"{data_dir}/team_data.csv", index=False)
-        print(f"   💾 Salvos em: team_data.csv")
-        
-        # 4. Coletar rosters históricos
-        print(f"\n👥 4. Coletando rosters históricos...")
-        roster_data = nfl.import_seasonal_rosters(years=years)
-        print(f"   ✅ Dados de rosters: {roster_data.shape}")
-        
+        print(f"   💾 Salvos em: team_data.parquet / team_data.csv")
+
         # Filtrar apenas posições de fantasy
         roster_fantasy = roster_data[roster_data['position'].isin(fantasy_positions)].copy()
         print(f"   🎯 Rosters de fantasy: {roster_fantasy.shape}")
+
+        del roster_data
+        gc.collect()
         
         # Limpar tipos de dados
         roster_fantasy = clean_data_types(roster_fantasy)
         
         # Salvar dados de rosters
-        roster_fantasy.to_csv(f"{data_dir}/roster_fantasy_data.csv", index=False)
-        print(f"   💾 Salvos em: roster_fantasy_data.csv")
+        roster_fantasy.to_parquet(f"{data_dir}/roster_fantasy_data.parquet",
+                                  engine='pyarrow', compression='zstd', index=False)
+        print(f"   💾 Salvos em: roster_fantasy_data.parquet")
         
         # 5. Análise dos dados coletados
         print(f"\n🔍 5. Análise dos dados coletados...")
@@ -120,29 +148,55 @@ def collect_historical_data():
         
         # Merge com dados semanais
         weekly_consolidated = weekly_fantasy.merge(team_info, left_on='recent_team', right_on='team', how='left')
-        
-        # Adicionar informações básicas de roster (sem problemas de tipo)
-        roster_info = roster_fantasy[['season', 'team', 'player_id', 'height', 'weight', 'college']].copy()
-        weekly_consolidated = weekly_consolidated.merge(
-            roster_info, 
-            on=['season', 'player_id'], 
-            how='left',
-            suffixes=('', '_roster')
+
+        # O recorte semanal já está dentro do consolidado; liberar antes dos
+        # lookups/escritas pesadas reduz o pico de memória pela metade
+        del weekly_fantasy
+        gc.collect()
+        
+        # Adicionar informações básicas de roster via lookup .map por
+        # (season, player_id) — o roster é pequeno, então três maps vetorizados
+        # evitam o hash-join completo do merge sobre milhões de linhas
+        roster_idx = roster_fantasy[['season', 'player_id', 'height', 'weight', 'college']] \
+            .drop_duplicates(['season', 'player_id']).set_index(['season', 'player_id'])
+
+        del roster_fantasy
+        gc.collect()
+
+        weekly_keys = pd.MultiIndex.from_arrays(
+            [weekly_consolidated['season'], weekly_consolidated['player_id']]
         )
+        for col in ['height', 'weight', 'college']:
+            weekly_consolidated[col] = weekly_keys.map(roster_idx[col])
         
         print(f"   ✅ Dataset consolidado: {weekly_consolidated.shape}")
-        
-        # Salvar dataset consolidado
-        weekly_consolidated.to_csv(f"{data_dir}/consolidated_fantasy_data.csv", index=False)
-        print(f"   💾 Salvos em: consolidated_fantasy_data.csv")
-        
-        # 7. Criar datasets por posição
-        print(f"\n📂 7. Criando datasets por posição...")
-        
-        for pos in fantasy_positions:
-            pos_data = weekly_consolidated[weekly_consolidated['position'] == pos].copy()
-            pos_data.to_csv(f"{data_dir}/{pos.lower()}_data.csv", index=False)
-            print(f"   💾 {pos}: {pos_data.shape} -> {pos.lower()}_data.csv")
+
+        # Converter colunas-chave para Categorical (acelera groupby/isin downstream)
+        for col in ['position', 'player_id', 'player_display_name', 'recent_team']:
+            if col in weekly_consolidated.columns:
+                weekly_consolidated[col] = weekly_consolidated[col].astype('category')
+        
+        # Salvar dataset consolidado (Parquet + CSV apenas para compatibilidade com o app)
+        weekly_consolidated.to_parquet(f"{data_dir}/consolidated_fantasy_data.parquet",
+                                       engine='pyarrow', compression='zstd', index=False)
+        print(f"   💾 Salvos em: consolidated_fantasy_data.parquet")
+
+        # Buffer grande reduz o número de syscalls na escrita de ~GB de texto
+        with open(f"{data_dir}/consolidated_fantasy_data.csv", 'w', buffering=1 << 20, newline='') as csv_file:
+            weekly_consolidated.to_csv(csv_file, index=False)
+        print(f"   💾 Salvos em: consolidated_fantasy_data.csv (compatibilidade)")
+
+        # 7. Criar dataset particionado por posição: em vez de gravar 4 cópias
+        # filtradas, uma única escrita particionada permite que os leitores
+        # puxem só a posição desejada sem duplicar bytes em disco
+        print(f"\n📂 7. Criando dataset particionado por posição...")
+
+        weekly_consolidated.to_parquet(
+            f"{data_dir}/by_position",
+            engine='pyarrow', compression='zstd', index=False,
+            partition_cols=['position']
+        )
+        print(f"   💾 Particionado em: by_position/position=<POS>/")
         
         # 8. Criar resumo dos dados
         print(f"\n📋 8. Criando resumo dos dados...")
@@ -157,15 +211,14 @@ def collect_historical_data():
             'columns_available': len(weekly_consolidated.columns),
             'fantasy_columns': fantasy_cols,
             'files_created': [
-                'weekly_fantasy_data.csv',
-                'seasonal_data.csv', 
+                'weekly_fantasy_data.parquet',
+                'seasonal_data.parquet',
+                'team_data.parquet',
                 'team_data.csv',
-                'roster_fantasy_data.csv',
+                'roster_fantasy_data.parquet',
+                'consolidated_fantasy_data.parquet',
                 'consolidated_fantasy_data.csv',
-                'qb_data.csv',
-                'rb_data.csv', 
-                'wr_data.csv',
-                'te_data.csv'
+                'by_position/'
             ]
         }
         
@@ -196,18 +249,19 @@ def create_sample_data():
     
     try:
         # Carregar dados consolidados
-        df = pd.read_csv(f"{data_dir}/consolidated_fantasy_data.csv")
-        
+        df = load_df(f"{data_dir}/consolidated_fantasy_data.parquet")
+
         # Criar amostra dos últimos 3 anos
         sample_years = [2022, 2023, 2024]
         sample_data = df[df['season'].isin(sample_years)].copy()
-        
+
         print(f"   📊 Amostra criada: {sample_data.shape}")
         print(f"   📅 Anos: {sorted(sample_data['season'].unique())}")
-        
+
         # Salvar amostra
-        sample_data.to_csv(f"{data_dir}/sample_fantasy_data.csv", index=False)
-        print(f"   💾 Amostra salva em: sample_fantasy_data.csv")
+        sample_data.to_parquet(f"{data_dir}/sample_fantasy_data.parquet",
+                               engine='pyarrow', compression='zstd', index=False)
+        print(f"   💾 Amostra salva em: sample_fantasy_data.parquet")
         
         return True
         
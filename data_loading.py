@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Carregamento centralizado de dados para NFL Fantasy Analytics
+"""
+
+import pandas as pd
+
+# Dtypes explícitos evitam a inferência do pandas na leitura e já entregam
+# colunas categóricas/compactas para os filtros e groupbys downstream
+CSV_DTYPES = {
+    'position': 'category',
+    'player_id': 'category',
+    'player_display_name': 'category',
+    'recent_team': 'category',
+    'season': 'int16',
+    'week': 'int8',
+    'fantasy_points_ppr': 'float32',
+}
+
+def downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Reduz colunas numéricas para tipos compactos (metade da banda de memória)
+
+    As estatísticas semanais cabem com folga em float32, e season/week em
+    int16/int8 — as agregações downstream são limitadas por memória, então
+    menos bytes por linha significa groupbys proporcionalmente mais rápidos.
+    """
+
+    for col in df.select_dtypes('float64').columns:
+        df[col] = df[col].astype('float32')
+
+    # season/week podem vir com NA no CSV consolidado (linhas sem box score);
+    # só compactar para inteiro quando a coluna não tem faltantes
+    for col, target in (('season', 'int16'), ('week', 'int8')):
+        if col in df.columns and df[col].dtype.kind != 'O' and df[col].notna().all():
+            df[col] = df[col].astype(target)
+
+    return df
+
+def load_df(path: str, dtype: dict = None) -> pd.DataFrame:
+    """Carrega um dataset (Parquet ou CSV) com engine pyarrow e dtypes explícitos"""
+
+    if path.endswith('.parquet'):
+        return downcast_numeric(pd.read_parquet(path, engine='pyarrow'))
+
+    if dtype is None:
+        dtype = CSV_DTYPES
+
+    # Aplicar apenas os dtypes de colunas presentes no arquivo; os alvos
+    # inteiros ficam para o downcast_numeric, que tolera colunas com NA
+    header = pd.read_csv(path, nrows=0)
+    usable_dtypes = {col: t for col, t in dtype.items()
+                     if col in header.columns and not str(t).startswith('int')}
+
+    # O leitor pyarrow é mais rápido, mas rejeita variações de quoting que o
+    # engine C aceita (ex.: linhas inteiramente entre aspas no CSV consolidado)
+    try:
+        return downcast_numeric(pd.read_csv(path, engine='pyarrow', dtype=usable_dtypes))
+    except pd.errors.ParserError:
+        return downcast_numeric(pd.read_csv(path, dtype=usable_dtypes))
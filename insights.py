@@ -6,35 +6,154 @@ Módulo de insights avançados para NFL Fantasy Analytics
 import pandas as pd
 import numpy as np
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional
 
+try:
+    import polars as pl
+    _HAS_POLARS = True
+except ImportError:
+    # polars é opcional: sem ele os insights usam o caminho pandas
+    _HAS_POLARS = False
+
+# Colunas-chave usadas em filtros e groupbys por todos os insights
+_CATEGORICAL_COLS = ['position', 'player_id', 'player_display_name', 'recent_team']
+
+def _ensure_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte colunas de string para Categorical (groupby/isin via códigos inteiros)"""
+
+    for col in _CATEGORICAL_COLS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+
+    return df
+
+def _df_cache_key(df: pd.DataFrame):
+    """Chave leve de cache para DataFrames (evita hashear o frame inteiro)"""
+
+    season_max = int(df['season'].max()) if 'season' in df.columns and len(df) else 0
+    points_sum = float(df['fantasy_points_ppr'].sum()) if 'fantasy_points_ppr' in df.columns else 0.0
+
+    return (df.shape, season_max, points_sum)
+
+# Configuração compartilhada de cache dos insights: os cálculos só precisam
+# ser refeitos quando o DataFrame filtrado realmente muda
+_INSIGHTS_CACHE = dict(show_spinner=False, max_entries=4, hash_funcs={pd.DataFrame: _df_cache_key})
+
+@st.cache_data(**_INSIGHTS_CACHE)
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza e pré-ordena o frame por (player_id, season)
+
+    Com o frame já ordenado pela chave, os groupbys por player_id com
+    sort=False reaproveitam as fronteiras ordenadas em vez de re-hashear a
+    coluna a cada chamada; o resultado fica em cache entre os insights.
+    """
+
+    df = _ensure_categoricals(df)
+
+    return df.sort_values(['player_id', 'season'], kind='mergesort')
+
+def _top_k(df: pd.DataFrame, col: str, k: int = 5, largest: bool = True) -> pd.DataFrame:
+    """Top-k por coluna via np.argpartition — O(N) em vez do sort completo
+
+    Equivalente a nlargest/nsmallest (inclusive ignorando NaN), mas só o
+    bloco final de k linhas é ordenado.
+    """
+
+    df = df[df[col].notna()]
+
+    if len(df) <= k:
+        return df.sort_values(col, ascending=not largest)
+
+    values = df[col].to_numpy()
+    if largest:
+        idx = np.argpartition(values, -k)[-k:]
+    else:
+        idx = np.argpartition(values, k - 1)[:k]
+
+    return df.iloc[idx].sort_values(col, ascending=not largest)
+
+@st.cache_data(**_INSIGHTS_CACHE)
+def _player_position_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega fantasy_points_ppr por (posição, jogador) em uma única passada
+
+    Vários insights precisam das mesmas estatísticas por jogador; calcular
+    tudo aqui evita re-escanear o frame completo em cada função. Quando o
+    polars está disponível, a agregação roda no engine multithread dele e o
+    resultado compacto volta para pandas no mesmo formato.
+    """
+
+    if _HAS_POLARS:
+        points = pl.col('fantasy_points_ppr')
+        return (
+            pl.from_pandas(df[['position', 'player_display_name', 'fantasy_points_ppr']])
+            .lazy()
+            .group_by(['position', 'player_display_name'])
+            .agg([
+                points.sum().alias('sum'),
+                points.mean().alias('mean'),
+                points.std().alias('std'),
+                points.count().alias('count'),
+                points.min().alias('min'),
+                points.max().alias('max'),
+            ])
+            .collect()
+            .to_pandas()
+            .set_index(['position', 'player_display_name'])
+        )
+
+    return df.groupby(['position', 'player_display_name'], observed=True)['fantasy_points_ppr'] \
+        .agg(['sum', 'mean', 'std', 'count', 'min', 'max'])
+
+@st.cache_data(**_INSIGHTS_CACHE)
 def calculate_rookie_insights(df: pd.DataFrame) -> Dict:
     """Calcula insights sobre performance de rookies por posição"""
-    
-    # Identificar rookies
-    player_first_season = df.groupby('player_id')['season'].min().reset_index()
-    player_first_season.columns = ['player_id', 'rookie_season']
-    
-    df_with_rookie = df.merge(player_first_season, on='player_id', how='left')
+
+    df = _prepare(df)
+
+    # Identificar rookies: transform('min') materializa a primeira temporada
+    # em uma única passada, sem o groupby + merge intermediário
+    df_with_rookie = df.assign(
+        rookie_season=df.groupby('player_id', observed=True, sort=False)['season'].transform('min')
+    )
     df_with_rookie['is_rookie'] = df_with_rookie['season'] == df_with_rookie['rookie_season']
-    
+    df_with_rookie['phase'] = np.where(df_with_rookie['week'] <= 4, 'early', 'late')
+
+    # Uma única agregação (sum/count) cobre todas as médias usadas abaixo,
+    # em vez de re-filtrar o frame inteiro várias vezes por posição
+    agg = df_with_rookie.groupby(['position', 'is_rookie', 'phase'],
+                                 observed=True, sort=False)['fantasy_points_ppr'].agg(['sum', 'count'])
+
+    # Top rookies históricos de todas as posições em uma única passada
+    rookie_totals = df_with_rookie[df_with_rookie['is_rookie']].groupby(
+        ['position', 'player_display_name', 'rookie_season'], observed=True, sort=False
+    ).agg({'fantasy_points_ppr': 'sum'}).reset_index()
+
+    def _group_mean(position, is_rookie, phase=None):
+        try:
+            rows = agg.loc[(position, is_rookie)]
+        except KeyError:
+            return np.nan
+        if phase is not None:
+            rows = rows.loc[[phase]] if phase in rows.index else rows.iloc[0:0]
+        total, count = rows['sum'].sum(), rows['count'].sum()
+        return total / count if count > 0 else np.nan
+
     insights = {}
-    
+
     for position in ['QB', 'RB', 'WR', 'TE']:
-        pos_data = df_with_rookie[df_with_rookie['position'] == position]
-        
-        rookie_avg = pos_data[pos_data['is_rookie']]['fantasy_points_ppr'].mean()
-        veteran_avg = pos_data[~pos_data['is_rookie']]['fantasy_points_ppr'].mean()
-        
+        rookie_avg = _group_mean(position, True)
+        veteran_avg = _group_mean(position, False)
+
         # Calcular top rookies históricos
-        top_rookies = pos_data[pos_data['is_rookie']].groupby(['player_display_name', 'rookie_season']).agg({
-            'fantasy_points_ppr': 'sum'
-        }).reset_index().nlargest(5, 'fantasy_points_ppr')
-        
+        top_rookies = rookie_totals[rookie_totals['position'] == position] \
+            .drop(columns='position')
+        top_rookies = _top_k(top_rookies, 'fantasy_points_ppr', 5)
+
         # Padrões de adaptação (primeiras 4 semanas vs resto da temporada)
-        rookie_early = pos_data[(pos_data['is_rookie']) & (pos_data['week'] <= 4)]['fantasy_points_ppr'].mean()
-        rookie_late = pos_data[(pos_data['is_rookie']) & (pos_data['week'] > 4)]['fantasy_points_ppr'].mean()
-        
+        rookie_early = _group_mean(position, True, 'early')
+        rookie_late = _group_mean(position, True, 'late')
+
         insights[position] = {
             'rookie_avg': rookie_avg,
             'veteran_avg': veteran_avg,
@@ -48,40 +167,51 @@ def calculate_rookie_insights(df: pd.DataFrame) -> Dict:
     
     return insights
 
+@st.cache_data(**_INSIGHTS_CACHE)
 def calculate_consistency_insights(df: pd.DataFrame) -> Dict:
     """Calcula insights sobre consistência de jogadores"""
-    
+
+    df = _ensure_categoricals(df)
+
+    # Estatísticas por jogador calculadas uma única vez para todas as posições
+    stats = _player_position_stats(df)
+
     insights = {}
-    
+
     for position in ['QB', 'RB', 'WR', 'TE']:
-        pos_data = df[df['position'] == position]
-        
-        # Calcular métricas de consistência por jogador
-        player_consistency = pos_data.groupby('player_display_name').agg({
-            'fantasy_points_ppr': ['mean', 'std', 'count', 'min', 'max']
-        }).reset_index()
-        
+        if position not in stats.index.get_level_values('position'):
+            continue
+
+        player_consistency = stats.xs(position, level='position')[
+            ['mean', 'std', 'count', 'min', 'max']
+        ].reset_index()
+
         player_consistency.columns = ['player', 'avg_points', 'std_points', 'games', 'min_points', 'max_points']
         
         # Filtrar jogadores com pelo menos 16 jogos (uma temporada)
         player_consistency = player_consistency[player_consistency['games'] >= 16]
         
         if not player_consistency.empty:
-            # Calcular coeficiente de variação
-            player_consistency['cv'] = player_consistency['std_points'] / player_consistency['avg_points']
-            
-            # Calcular floor e ceiling
-            player_consistency['floor'] = player_consistency['avg_points'] - player_consistency['std_points']
-            player_consistency['ceiling'] = player_consistency['avg_points'] + player_consistency['std_points']
-            
+            # Calcular cv/floor/ceiling em uma única passada numpy sobre os
+            # arrays, sem Series intermediárias nem alinhamento de índice
+            avg = player_consistency['avg_points'].to_numpy()
+            std = player_consistency['std_points'].to_numpy()
+
+            derived = np.empty((len(avg), 3), dtype=np.float32)
+            derived[:, 0] = std / avg      # coeficiente de variação
+            derived[:, 1] = avg - std      # floor
+            derived[:, 2] = avg + std      # ceiling
+
+            player_consistency[['cv', 'floor', 'ceiling']] = derived
+
             # Jogadores mais consistentes (menor CV)
-            most_consistent = player_consistency.nsmallest(5, 'cv')
+            most_consistent = _top_k(player_consistency, 'cv', 5, largest=False)
             
             # Jogadores com maior upside (maior ceiling)
-            highest_ceiling = player_consistency.nlargest(5, 'ceiling')
+            highest_ceiling = _top_k(player_consistency, 'ceiling', 5)
             
             # Jogadores mais seguros (maior floor)
-            highest_floor = player_consistency.nlargest(5, 'floor')
+            highest_floor = _top_k(player_consistency, 'floor', 5)
             
             insights[position] = {
                 'avg_cv': player_consistency['cv'].mean(),
@@ -93,27 +223,46 @@ def calculate_consistency_insights(df: pd.DataFrame) -> Dict:
     
     return insights
 
+@st.cache_data(**_INSIGHTS_CACHE)
 def calculate_breakout_insights(df: pd.DataFrame) -> Dict:
     """Calcula insights sobre jogadores breakout"""
-    
+
+    df = _prepare(df)
+
     # Identificar jogadores com múltiplas temporadas
-    player_seasons = df.groupby('player_id')['season'].nunique()
+    player_seasons = df.groupby('player_id', observed=True, sort=False)['season'].nunique()
     multi_season_players = player_seasons[player_seasons >= 2].index
-    
+
     multi_season_data = df[df['player_id'].isin(multi_season_players)].copy()
-    
-    # Calcular performance por temporada do jogador
-    player_season_stats = multi_season_data.groupby(['player_id', 'player_display_name', 'position', 'season']).agg({
+
+    # Calcular performance por temporada do jogador; com o frame pré-ordenado
+    # por (player_id, season) e sort=False, os grupos já saem nessa ordem e o
+    # sort_values explícito deixa de ser necessário
+    player_season_stats = multi_season_data.groupby(
+        ['player_id', 'player_display_name', 'position', 'season'], observed=True, sort=False
+    ).agg({
         'fantasy_points_ppr': 'sum'
     }).reset_index()
-    
-    # Ordenar por jogador e temporada
-    player_season_stats = player_season_stats.sort_values(['player_id', 'season'])
-    
-    # Calcular mudança year-over-year
-    player_season_stats['prev_season_points'] = player_season_stats.groupby('player_id')['fantasy_points_ppr'].shift(1)
-    player_season_stats['yoy_change'] = player_season_stats['fantasy_points_ppr'] - player_season_stats['prev_season_points']
-    player_season_stats['yoy_change_pct'] = (player_season_stats['yoy_change'] / player_season_stats['prev_season_points']) * 100
+
+    # Sem jogador multi-temporada (ex.: filtro de uma única temporada) não há
+    # comparação year-over-year — devolver vazio antes do scan de fronteiras
+    if player_season_stats.empty:
+        return {}
+
+    # Calcular mudança year-over-year: com as linhas já ordenadas por jogador,
+    # o shift por grupo vira um np.roll com NaN nas fronteiras entre jogadores,
+    # dispensando a máquina de groupby do pandas
+    points = player_season_stats['fantasy_points_ppr'].to_numpy(dtype=np.float64)
+    player_ids = player_season_stats['player_id'].to_numpy()
+
+    prev_points = np.roll(points, 1)
+    boundary = player_ids != np.roll(player_ids, 1)
+    boundary[0] = True
+    prev_points[boundary] = np.nan
+
+    player_season_stats['prev_season_points'] = prev_points
+    player_season_stats['yoy_change'] = points - prev_points
+    player_season_stats['yoy_change_pct'] = (points - prev_points) / prev_points * 100
     
     # Filtrar apenas mudanças válidas
     valid_changes = player_season_stats.dropna(subset=['yoy_change'])
@@ -128,13 +277,15 @@ def calculate_breakout_insights(df: pd.DataFrame) -> Dict:
             breakouts = pos_data[
                 (pos_data['yoy_change'] > 50) & 
                 (pos_data['yoy_change_pct'] > 25)
-            ].nlargest(10, 'yoy_change_pct')
+            ]
+            breakouts = _top_k(breakouts, 'yoy_change_pct', 10)
             
             # Maiores quedas
             busts = pos_data[
                 (pos_data['yoy_change'] < -50) & 
                 (pos_data['yoy_change_pct'] < -25)
-            ].nsmallest(10, 'yoy_change_pct')
+            ]
+            busts = _top_k(busts, 'yoy_change_pct', 10, largest=False)
             
             # Estatísticas gerais
             avg_improvement = pos_data['yoy_change'].mean()
@@ -151,111 +302,165 @@ def calculate_breakout_insights(df: pd.DataFrame) -> Dict:
     
     return insights
 
+@st.cache_data(**_INSIGHTS_CACHE)
 def calculate_positional_value_insights(df: pd.DataFrame) -> Dict:
     """Calcula insights sobre valor posicional (VBD - Value Based Drafting)"""
-    
+
+    df = _ensure_categoricals(df)
+
     insights = {}
     
+    # Replacement level (jogador #12 para QB, #24 para RB/WR, #12 para TE)
+    replacement_ranks = {'QB': 12, 'RB': 24, 'WR': 24, 'TE': 12}
+
     # Calcular pontos por temporada para cada jogador
-    season_totals = df.groupby(['player_id', 'player_display_name', 'position', 'season']).agg({
+    season_totals = df.groupby(['player_id', 'player_display_name', 'position', 'season'],
+                               observed=True, sort=False).agg({
         'fantasy_points_ppr': 'sum'
     }).reset_index()
-    
-    for season in sorted(df['season'].unique()):
-        season_data = season_totals[season_totals['season'] == season]
-        
-        position_insights = {}
-        
-        for position in ['QB', 'RB', 'WR', 'TE']:
-            pos_data = season_data[season_data['position'] == position].sort_values('fantasy_points_ppr', ascending=False)
-            
-            if not pos_data.empty:
-                # Calcular replacement level (jogador #12 para QB, #24 para RB/WR, #12 para TE)
-                replacement_ranks = {'QB': 12, 'RB': 24, 'WR': 24, 'TE': 12}
-                replacement_rank = replacement_ranks.get(position, 12)
-                
-                if len(pos_data) >= replacement_rank:
-                    replacement_value = pos_data.iloc[replacement_rank - 1]['fantasy_points_ppr']
-                else:
-                    replacement_value = pos_data.iloc[-1]['fantasy_points_ppr']
-                
-                # Calcular VBD para top players
-                pos_data['vbd'] = pos_data['fantasy_points_ppr'] - replacement_value
-                
-                # Top 10 por VBD
-                top_vbd = pos_data.head(10)
-                
-                position_insights[position] = {
-                    'replacement_value': replacement_value,
-                    'top_vbd_players': top_vbd,
-                    'position_depth': len(pos_data[pos_data['fantasy_points_ppr'] > replacement_value]),
-                    'avg_starter_points': pos_data.head(replacement_rank)['fantasy_points_ppr'].mean(),
-                    'scarcity_score': pos_data.head(5)['fantasy_points_ppr'].std()  # Maior std = mais escassez no topo
-                }
-        
-        insights[season] = position_insights
-    
+
+    # Ranqueamento vetorizado dentro de cada (temporada, posição) — substitui
+    # o loop Python de sort + iloc por temporada/posição
+    season_totals = season_totals[season_totals['position'].isin(replacement_ranks)]
+    season_totals = season_totals.sort_values(['season', 'position', 'fantasy_points_ppr'],
+                                              ascending=[True, True, False])
+
+    grouped_points = season_totals.groupby(['season', 'position'], observed=True)['fantasy_points_ppr']
+    season_totals['rank'] = grouped_points.rank(method='first', ascending=False)
+    season_totals['replacement_rank'] = season_totals['position'].map(replacement_ranks).astype(int)
+
+    # Replacement value por (temporada, posição): jogador no replacement_rank,
+    # ou o último colocado quando o grupo é menor que o rank
+    effective_rank = np.minimum(season_totals['replacement_rank'], grouped_points.transform('size'))
+    replacement_values = season_totals.loc[
+        season_totals['rank'] == effective_rank,
+        ['season', 'position', 'fantasy_points_ppr']
+    ].rename(columns={'fantasy_points_ppr': 'replacement_value'})
+
+    season_totals = season_totals.merge(replacement_values, on=['season', 'position'], how='left')
+
+    # VBD em uma única operação vetorial
+    season_totals['vbd'] = season_totals['fantasy_points_ppr'] - season_totals['replacement_value']
+
+    for (season, position), pos_data in season_totals.groupby(['season', 'position'], observed=True):
+        if pos_data.empty:
+            continue
+
+        replacement_value = pos_data['replacement_value'].iloc[0]
+        replacement_rank = replacement_ranks[position]
+
+        insights.setdefault(season, {})[position] = {
+            'replacement_value': replacement_value,
+            'top_vbd_players': pos_data.head(10),
+            'position_depth': int((pos_data['fantasy_points_ppr'] > replacement_value).sum()),
+            'avg_starter_points': pos_data.head(replacement_rank)['fantasy_points_ppr'].mean(),
+            'scarcity_score': pos_data.head(5)['fantasy_points_ppr'].std()  # Maior std = mais escassez no topo
+        }
+
     return insights
 
+def _grouped_mean(codes: np.ndarray, values: np.ndarray, mask: np.ndarray, n_groups: int) -> np.ndarray:
+    """Média por grupo em uma única passada C via np.bincount
+
+    Recebe códigos inteiros de grupo (códigos categóricos/factorize) e devolve
+    a média de `values[mask]` por grupo, com NaN para grupos sem dados.
+    """
+
+    sums = np.bincount(codes[mask], weights=values[mask], minlength=n_groups)
+    counts = np.bincount(codes[mask], minlength=n_groups)
+
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+def _weekly_trends_for_position(pos_data: pd.DataFrame) -> Dict:
+    """Calcula as tendências semanais de uma única posição"""
+
+    # Tendências por semana da temporada
+    weekly_avg = pos_data.groupby('week')['fantasy_points_ppr'].mean()
+
+    # Identificar semanas de pico e vale
+    peak_week = weekly_avg.idxmax()
+    valley_week = weekly_avg.idxmin()
+
+    # Tendência geral (correlação com semana)
+    correlation = pos_data['week'].corr(pos_data['fantasy_points_ppr'])
+
+    # Análise de playoffs (semanas 15-17)
+    playoff_weeks = pos_data[pos_data['week'].isin([15, 16, 17])]
+    regular_weeks = pos_data[pos_data['week'].isin(range(1, 15))]
+
+    playoff_avg = playoff_weeks['fantasy_points_ppr'].mean()
+    regular_avg = regular_weeks['fantasy_points_ppr'].mean()
+
+    # Jogadores que melhoram nos playoffs: médias regular/playoff por jogador
+    # em duas passadas bincount sobre os códigos inteiros, sem a máquina de
+    # groupby/unstack do pandas
+    names = pos_data['player_display_name']
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        codes, labels = names.cat.codes.to_numpy(), names.cat.categories
+    else:
+        codes, labels = pd.factorize(names)
+
+    weeks = pos_data['week'].to_numpy()
+    points = pos_data['fantasy_points_ppr'].to_numpy(dtype=np.float64)
+    valid = (codes >= 0) & (weeks <= 17) & ~np.isnan(points)
+
+    regular_mean = _grouped_mean(codes, points, valid & (weeks < 15), len(labels))
+    playoff_mean = _grouped_mean(codes, points, valid & (weeks >= 15), len(labels))
+
+    player_playoff_performance = pd.Series(playoff_mean - regular_mean, index=labels) \
+        .dropna().sort_values(ascending=False)
+
+    return {
+        'weekly_averages': weekly_avg.to_dict(),
+        'peak_week': peak_week,
+        'valley_week': valley_week,
+        'seasonal_trend': 'increasing' if correlation > 0.1 else 'decreasing' if correlation < -0.1 else 'stable',
+        'playoff_boost': playoff_avg - regular_avg,
+        'top_playoff_performers': player_playoff_performance.head(5).to_dict()
+    }
+
+@st.cache_data(**_INSIGHTS_CACHE)
 def calculate_weekly_trends_insights(df: pd.DataFrame) -> Dict:
     """Calcula insights sobre tendências semanais"""
-    
-    insights = {}
-    
-    for position in ['QB', 'RB', 'WR', 'TE']:
-        pos_data = df[df['position'] == position]
-        
-        # Tendências por semana da temporada
-        weekly_avg = pos_data.groupby('week')['fantasy_points_ppr'].mean()
-        
-        # Identificar semanas de pico e vale
-        peak_week = weekly_avg.idxmax()
-        valley_week = weekly_avg.idxmin()
-        
-        # Tendência geral (correlação com semana)
-        correlation = pos_data['week'].corr(pos_data['fantasy_points_ppr'])
-        
-        # Análise de playoffs (semanas 15-17)
-        playoff_weeks = pos_data[pos_data['week'].isin([15, 16, 17])]
-        regular_weeks = pos_data[pos_data['week'].isin(range(1, 15))]
-        
-        playoff_avg = playoff_weeks['fantasy_points_ppr'].mean()
-        regular_avg = regular_weeks['fantasy_points_ppr'].mean()
-        
-        # Jogadores que melhoram nos playoffs
-        player_playoff_performance = pos_data.groupby('player_display_name').apply(
-            lambda x: x[x['week'].isin([15, 16, 17])]['fantasy_points_ppr'].mean() - 
-                     x[x['week'].isin(range(1, 15))]['fantasy_points_ppr'].mean()
-        ).sort_values(ascending=False)
-        
-        insights[position] = {
-            'weekly_averages': weekly_avg.to_dict(),
-            'peak_week': peak_week,
-            'valley_week': valley_week,
-            'seasonal_trend': 'increasing' if correlation > 0.1 else 'decreasing' if correlation < -0.1 else 'stable',
-            'playoff_boost': playoff_avg - regular_avg,
-            'top_playoff_performers': player_playoff_performance.head(5).to_dict()
-        }
-    
-    return insights
 
+    df = _ensure_categoricals(df)
+
+    # Fatiar o frame por posição uma única vez
+    by_position = {pos: pos_data for pos, pos_data in df.groupby('position', observed=True)
+                   if pos in ['QB', 'RB', 'WR', 'TE'] and not pos_data.empty}
+
+    # As posições são independentes e os groupbys do pandas liberam o GIL no
+    # código C, então threads dão paralelismo real neste loop
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = executor.map(
+            lambda pos: (pos, _weekly_trends_for_position(by_position[pos])),
+            by_position
+        )
+
+    return dict(results)
+
+@st.cache_data(**_INSIGHTS_CACHE)
 def generate_draft_recommendations(df: pd.DataFrame, current_season: int = 2024) -> Dict:
     """Gera recomendações de draft baseadas nos insights"""
-    
+
+    df = _ensure_categoricals(df)
+
     # Usar dados das últimas 3 temporadas para projeções
     recent_data = df[df['season'].isin([current_season - 2, current_season - 1, current_season])]
     
+    # Uma única agregação por (posição, jogador) atende todas as posições
+    stats = _player_position_stats(recent_data)
+
     recommendations = {}
-    
+
     for position in ['QB', 'RB', 'WR', 'TE']:
-        pos_data = recent_data[recent_data['position'] == position]
-        
-        # Calcular métricas agregadas por jogador
-        player_metrics = pos_data.groupby('player_display_name').agg({
-            'fantasy_points_ppr': ['mean', 'std', 'sum'],
-            'season': 'count'
-        }).reset_index()
-        
+        if position not in stats.index.get_level_values('position'):
+            continue
+
+        player_metrics = stats.xs(position, level='position')[
+            ['mean', 'std', 'sum', 'count']
+        ].reset_index()
+
         player_metrics.columns = ['player', 'avg_ppg', 'std_ppg', 'total_points', 'seasons_played']
         
         # Filtrar jogadores com pelo menos 2 temporadas
@@ -267,9 +472,9 @@ def generate_draft_recommendations(df: pd.DataFrame, current_season: int = 2024)
             experienced_players['draft_score'] = (experienced_players['avg_ppg'] * 0.7) + (experienced_players['consistency_score'] * 0.3)
             
             # Top recomendações
-            top_safe_picks = experienced_players.nlargest(5, 'consistency_score')
-            top_upside_picks = experienced_players.nlargest(5, 'avg_ppg')
-            top_overall = experienced_players.nlargest(10, 'draft_score')
+            top_safe_picks = _top_k(experienced_players, 'consistency_score', 5)
+            top_upside_picks = _top_k(experienced_players, 'avg_ppg', 5)
+            top_overall = _top_k(experienced_players, 'draft_score', 10)
             
             recommendations[position] = {
                 'safe_picks': top_safe_picks[['player', 'avg_ppg', 'std_ppg', 'consistency_score']].to_dict('records'),
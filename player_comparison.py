@@ -11,9 +11,127 @@ from plotly.subplots import make_subplots
 import streamlit as st
 from typing import List, Dict
 
+# Polars é opcional: quando instalado, a agregação por jogador usa o engine
+# multi-thread dele; caso contrário o caminho pandas continua valendo
+try:
+    import polars as pl
+    _HAS_POLARS = True
+except ImportError:
+    _HAS_POLARS = False
+
+def _df_cache_key(df: pd.DataFrame):
+    """Chave leve de cache para DataFrames (evita hashear o frame inteiro)"""
+
+    season_max = int(df['season'].max()) if 'season' in df.columns and len(df) else 0
+    points_sum = float(df['fantasy_points_ppr'].sum()) if 'fantasy_points_ppr' in df.columns else 0.0
+
+    return (df.shape, season_max, points_sum)
+
+# Cache limitado com TTL: reruns de widgets viram hits O(1) em vez de
+# re-escanear o dataset inteiro, sem deixar a memória crescer sem limite
+_COMPARISON_CACHE = dict(ttl="10m", max_entries=32, show_spinner=False,
+                         hash_funcs={pd.DataFrame: _df_cache_key})
+
+@st.cache_resource(show_spinner=False)
+def _numba_rolling_ready() -> bool:
+    """Pré-compila o kernel numba da média móvel (uma vez por processo)
+
+    O primeiro rolling com engine='numba' paga o custo de compilação JIT;
+    aquecer aqui tira esse custo do caminho interativo. Se o numba não
+    estiver instalado, cai de volta para o engine cython padrão.
+    """
+
+    try:
+        pd.Series([0.0, 1.0]).rolling(window=2, min_periods=1).mean(
+            engine='numba', engine_kwargs={'nopython': True, 'parallel': False}
+        )
+        return True
+    except (ImportError, TypeError):
+        return False
+
+@st.cache_data(**_COMPARISON_CACHE)
+def _preprocess_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza dtypes uma vez por dataset (categóricas + inteiros compactos)
+
+    Colunas de texto repetitivo viram Categorical (comparações e groupbys
+    passam a operar sobre códigos inteiros) e season/week descem para int16.
+    Cacheado para que o custo da conversão seja pago uma única vez.
+    """
+
+    df = df.copy()
+
+    for col in ['player_display_name', 'position', 'recent_team']:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+
+    for col in ['season', 'week']:
+        if col in df.columns:
+            df[col] = df[col].astype('int16')
+
+    # float32 basta para pontos de fantasy (2 casas decimais, faixa < 10^3)
+    # e corta pela metade os bytes movidos por cada groupby/rolling/sum
+    if 'fantasy_points_ppr' in df.columns:
+        df['fantasy_points_ppr'] = df['fantasy_points_ppr'].astype(np.float32)
+
+    return df
+
+@st.cache_data(**_COMPARISON_CACHE)
+def _available_seasons(df: pd.DataFrame) -> List:
+    """Lista de temporadas disponíveis, da mais recente para a mais antiga"""
+
+    return sorted(df['season'].unique(), reverse=True)
+
+@st.cache_data(**_COMPARISON_CACHE)
+def _compute_filtered_data(df: pd.DataFrame, position: str, seasons: tuple) -> pd.DataFrame:
+    """Filtra o dataset por posição e temporadas selecionadas"""
+
+    return df[(df['position'] == position) & (df['season'].isin(seasons))]
+
+@st.cache_data(**_COMPARISON_CACHE)
+def _compute_player_stats(df: pd.DataFrame, position: str, seasons: tuple) -> pd.DataFrame:
+    """Calcula estatísticas agregadas por jogador para o filtro selecionado"""
+
+    filtered_data = _compute_filtered_data(df, position, seasons)
+
+    if _HAS_POLARS:
+        # Agregação multi-thread via Polars, projetando só as colunas usadas
+        player_stats = (
+            pl.from_pandas(filtered_data[['player_display_name', 'fantasy_points_ppr', 'recent_team']])
+            .lazy()
+            .group_by('player_display_name', maintain_order=True)
+            .agg([
+                pl.col('fantasy_points_ppr').sum().alias('total_points'),
+                pl.col('fantasy_points_ppr').mean().alias('avg_points'),
+                pl.col('fantasy_points_ppr').std().alias('std_points'),
+                pl.col('fantasy_points_ppr').count().alias('games'),
+                pl.col('fantasy_points_ppr').min().alias('min_points'),
+                pl.col('fantasy_points_ppr').max().alias('max_points'),
+                pl.col('recent_team').last().alias('team'),
+            ])
+            .collect().to_pandas()
+            .rename(columns={'player_display_name': 'player'})
+        )
+        player_stats = player_stats[['player', 'total_points', 'avg_points', 'std_points',
+                                     'games', 'min_points', 'max_points', 'team']]
+    else:
+        player_stats = filtered_data.groupby('player_display_name', observed=True, sort=False).agg({
+            'fantasy_points_ppr': ['sum', 'mean', 'std', 'count', 'min', 'max'],
+            'recent_team': 'last'
+        }).reset_index()
+
+        player_stats.columns = ['player', 'total_points', 'avg_points', 'std_points', 'games',
+                                'min_points', 'max_points', 'team']
+
+    # Filtrar jogadores com pelo menos 8 jogos
+    player_stats = player_stats[player_stats['games'] >= 8]
+
+    return player_stats.sort_values('total_points', ascending=False)
+
 def create_player_comparison_interface(df: pd.DataFrame):
     """Cria interface para comparação de jogadores"""
-    
+
+    df = _preprocess_df(df)
+
     st.markdown("### 🆚 Comparação Detalhada de Jogadores")
     
     # Filtros para seleção de jogadores
@@ -29,45 +147,40 @@ def create_player_comparison_interface(df: pd.DataFrame):
     
     with col2:
         # Filtro por temporadas
-        available_seasons = sorted(df['season'].unique(), reverse=True)
+        available_seasons = _available_seasons(df)
         selected_seasons = st.multiselect(
             "📅 Temporadas para Comparação:",
             options=available_seasons,
             default=available_seasons[:3],
             help="Selecione as temporadas para análise"
         )
-    
-    # Filtrar dados por posição e temporadas
-    filtered_data = df[
-        (df['position'] == position_filter) & 
-        (df['season'].isin(selected_seasons))
-    ]
-    
+
+    # Tupla ordenada como chave de cache: a mesma seleção em ordem diferente
+    # reaproveita a mesma entrada
+    seasons_key = tuple(sorted(selected_seasons))
+
+    # Filtrar dados por posição e temporadas (cacheado por posição/temporadas)
+    filtered_data = _compute_filtered_data(df, position_filter, seasons_key)
+
     if filtered_data.empty:
         st.warning("⚠️ Nenhum dado encontrado com os filtros selecionados.")
         return
-    
-    # Calcular estatísticas agregadas por jogador
-    player_stats = filtered_data.groupby('player_display_name').agg({
-        'fantasy_points_ppr': ['sum', 'mean', 'std', 'count'],
-        'recent_team': 'last'
-    }).reset_index()
-    
-    player_stats.columns = ['player', 'total_points', 'avg_points', 'std_points', 'games', 'team']
-    
-    # Filtrar jogadores com pelo menos 8 jogos
-    player_stats = player_stats[player_stats['games'] >= 8]
-    
-    # Ordenar por total de pontos
-    player_stats = player_stats.sort_values('total_points', ascending=False)
+
+    # Estatísticas agregadas por jogador (cacheadas com o mesmo filtro)
+    player_stats = _compute_player_stats(df, position_filter, seasons_key)
     
     # Seleção de jogadores para comparação
     st.markdown("#### 👥 Selecionar Jogadores para Comparação")
     
-    # Criar opções de jogadores com informações
+    # Criar opções de jogadores com informações (zip de arrays em vez de
+    # iterrows, que materializa uma Series por linha)
+    top_stats = player_stats.head(50)
     player_options = [
-        f"{row['player']} ({row['team']}) - {row['total_points']:.0f} pts, {row['games']} jogos"
-        for _, row in player_stats.head(50).iterrows()
+        f"{player} ({team}) - {total:.0f} pts, {games} jogos"
+        for player, team, total, games in zip(
+            top_stats['player'].to_numpy(), top_stats['team'].to_numpy(),
+            top_stats['total_points'].to_numpy(), top_stats['games'].to_numpy()
+        )
     ]
     
     selected_players = st.multiselect(
@@ -85,138 +198,207 @@ def create_player_comparison_interface(df: pd.DataFrame):
         st.warning("⚠️ Máximo de 5 jogadores permitido. Usando os primeiros 5 selecionados.")
         selected_players = selected_players[:5]
     
-    # Extrair nomes dos jogadores selecionados
-    player_names = [player.split(' (')[0] for player in selected_players]
-    
-    # Filtrar dados dos jogadores selecionados
-    comparison_data = filtered_data[filtered_data['player_display_name'].isin(player_names)]
+    # Memoizar na sessão a extração de nomes e o recorte por jogador: reruns
+    # que não mudam a seleção reutilizam o frame já filtrado
+    cmp_key = (position_filter, seasons_key, tuple(selected_players))
+
+    if st.session_state.get('cmp_key') != cmp_key:
+        player_names = [player.split(' (')[0] for player in selected_players]
+        st.session_state['cmp_key'] = cmp_key
+        st.session_state['cmp_names'] = player_names
+        st.session_state['cmp_data'] = filtered_data[
+            filtered_data['player_display_name'].isin(player_names)
+        ]
+
+    player_names = st.session_state['cmp_names']
+    comparison_data = st.session_state['cmp_data']
     
     # Criar visualizações de comparação
     create_comparison_visualizations(comparison_data, player_names, position_filter)
     
-    # Criar tabela de estatísticas comparativas
-    create_comparison_table(comparison_data, player_names)
+    # Criar tabela de estatísticas comparativas (reutiliza o agregado cacheado)
+    create_comparison_table(comparison_data, player_names, player_stats)
+
+# Métricas relevantes por posição (compartilhadas entre as abas)
+_POSITION_METRICS = {
+    'QB': ['fantasy_points_ppr', 'passing_yards', 'passing_tds', 'interceptions', 'rushing_yards'],
+    'RB': ['fantasy_points_ppr', 'rushing_yards', 'rushing_tds', 'receptions', 'receiving_yards'],
+    'WR': ['fantasy_points_ppr', 'receptions', 'receiving_yards', 'receiving_tds', 'targets'],
+    'TE': ['fantasy_points_ppr', 'receptions', 'receiving_yards', 'receiving_tds', 'targets']
+}
 
 def create_comparison_visualizations(df: pd.DataFrame, players: List[str], position: str):
     """Cria visualizações para comparação de jogadores"""
-    
+
     st.markdown("#### 📊 Visualizações Comparativas")
-    
+
+    # Um único agg nomeado alimenta as abas de estatísticas, consistência e
+    # head-to-head — cada uma refazia seu próprio groupby sobre os mesmos dados
+    metrics = _POSITION_METRICS.get(position, ['fantasy_points_ppr'])
+
+    agg_spec = {
+        'total_points': ('fantasy_points_ppr', 'sum'),
+        'avg_points': ('fantasy_points_ppr', 'mean'),
+        'std_points': ('fantasy_points_ppr', 'std'),
+        'min_points': ('fantasy_points_ppr', 'min'),
+        'max_points': ('fantasy_points_ppr', 'max'),
+        'games': ('fantasy_points_ppr', 'count'),
+        'first_season': ('season', 'min'),
+        'last_season': ('season', 'max'),
+    }
+    agg_spec.update({metric: (metric, 'mean') for metric in metrics
+                     if metric != 'fantasy_points_ppr'})
+
+    player_stats = df.groupby('player_display_name', observed=True, sort=False).agg(**agg_spec).reset_index() \
+        .rename(columns={'player_display_name': 'player'})
+
+    # Médias por métrica da posição, derivadas do mesmo agregado
+    player_averages = player_stats[
+        ['player'] + [metric for metric in metrics if metric != 'fantasy_points_ppr']
+    ].rename(columns={'player': 'player_display_name'})
+    player_averages['fantasy_points_ppr'] = player_stats['avg_points'].values
+
     # Tab para diferentes tipos de comparação
     comp_tab1, comp_tab2, comp_tab3, comp_tab4 = st.tabs([
         "📈 Performance Temporal", "📊 Estatísticas Médias", "🎯 Consistência", "📋 Head-to-Head"
     ])
-    
+
     with comp_tab1:
         create_temporal_comparison(df, players)
-    
+
     with comp_tab2:
-        create_stats_comparison(df, players, position)
-    
+        create_stats_comparison(player_averages, players, position)
+
     with comp_tab3:
-        create_consistency_comparison(df, players)
-    
+        create_consistency_comparison(player_stats, players)
+
     with comp_tab4:
-        create_head_to_head_comparison(df, players)
+        create_head_to_head_comparison(player_stats, players)
+
+# Cache de builders de figura: chave inclui os arrays/frames plotados
+_FIGURE_CACHE = dict(ttl="10m", max_entries=32, show_spinner=False,
+                     hash_funcs={np.ndarray: lambda a: a.tobytes(),
+                                 pd.DataFrame: _df_cache_key})
+
+@st.cache_data(**_FIGURE_CACHE)
+def _build_temporal_figure(temporal_sorted: pd.DataFrame, players: tuple) -> go.Figure:
+    """Monta o gráfico de linha temporal num único px.line multi-trace"""
 
-def create_temporal_comparison(df: pd.DataFrame, players: List[str]):
-    """Cria gráfico de comparação temporal"""
-    
-    st.markdown("##### 📈 Performance ao Longo do Tempo")
-    
-    # Preparar dados por semana/temporada
-    temporal_data = df.groupby(['player_display_name', 'season', 'week']).agg({
-        'fantasy_points_ppr': 'sum'
-    }).reset_index()
-    
-    # Criar coluna de identificação temporal
-    temporal_data['game_id'] = temporal_data['season'].astype(str) + '-W' + temporal_data['week'].astype(str)
-    
-    # Gráfico de linha temporal
-    fig = go.Figure()
-    
     colors = ['#e74c3c', '#3498db', '#f1c40f', '#27ae60', '#9b59b6']
-    
-    for i, player in enumerate(players):
-        player_data = temporal_data[temporal_data['player_display_name'] == player]
-        
-        fig.add_trace(go.Scatter(
-            x=list(range(len(player_data))),
-            y=player_data['fantasy_points_ppr'],
-            mode='lines+markers',
-            name=player,
-            line=dict(color=colors[i % len(colors)], width=2),
-            marker=dict(size=4),
-            hovertemplate=f'<b>{player}</b><br>' +
-                         'Jogo: %{x}<br>' +
-                         'Fantasy Points: %{y:.1f}<br>' +
-                         '<extra></extra>'
-        ))
-    
+
+    # plotly.express monta todos os traces numa passada interna, sem o
+    # despacho Python por jogador do antigo loop de add_trace
+    fig = px.line(
+        temporal_sorted,
+        x='game_idx',
+        y='fantasy_points_ppr',
+        color='player_display_name',
+        color_discrete_sequence=colors,
+        markers=True,
+        category_orders={'player_display_name': list(players)},
+        labels={'game_idx': 'Jogos (Cronológico)',
+                'fantasy_points_ppr': 'Fantasy Points PPR'}
+    )
+
+    fig.update_traces(line=dict(width=2), marker=dict(size=4))
+
     fig.update_layout(
         title="Fantasy Points PPR por Jogo",
-        xaxis_title="Jogos (Cronológico)",
-        yaxis_title="Fantasy Points PPR",
+        legend_title_text='',
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font_color='white',
         height=400
     )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Gráfico de média móvel
-    st.markdown("##### 📊 Média Móvel (5 jogos)")
-    
-    fig_ma = go.Figure()
-    
-    for i, player in enumerate(players):
-        player_data = temporal_data[temporal_data['player_display_name'] == player].sort_values(['season', 'week'])
-        
-        # Calcular média móvel
-        player_data['moving_avg'] = player_data['fantasy_points_ppr'].rolling(window=5, min_periods=1).mean()
-        
-        fig_ma.add_trace(go.Scatter(
-            x=list(range(len(player_data))),
-            y=player_data['moving_avg'],
-            mode='lines',
-            name=f"{player} (MA5)",
-            line=dict(color=colors[i % len(colors)], width=3),
-            hovertemplate=f'<b>{player}</b><br>' +
-                         'Média Móvel: %{y:.1f}<br>' +
-                         '<extra></extra>'
-        ))
-    
+
+    return fig
+
+@st.cache_data(**_FIGURE_CACHE)
+def _build_moving_avg_figure(temporal_sorted: pd.DataFrame, players: tuple) -> go.Figure:
+    """Monta o gráfico de média móvel num único px.line multi-trace"""
+
+    colors = ['#e74c3c', '#3498db', '#f1c40f', '#27ae60', '#9b59b6']
+
+    fig_ma = px.line(
+        temporal_sorted,
+        x='game_idx',
+        y='moving_avg',
+        color='player_display_name',
+        color_discrete_sequence=colors,
+        category_orders={'player_display_name': list(players)},
+        labels={'game_idx': 'Jogos (Cronológico)',
+                'moving_avg': 'Fantasy Points PPR (Média Móvel)'}
+    )
+
+    fig_ma.update_traces(line=dict(width=3))
+
     fig_ma.update_layout(
         title="Média Móvel de Fantasy Points (5 jogos)",
-        xaxis_title="Jogos (Cronológico)",
-        yaxis_title="Fantasy Points PPR (Média Móvel)",
+        legend_title_text='',
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font_color='white',
         height=400
     )
-    
-    st.plotly_chart(fig_ma, use_container_width=True)
 
-def create_stats_comparison(df: pd.DataFrame, players: List[str], position: str):
-    """Cria comparação de estatísticas médias"""
-    
+    return fig_ma
+
+@st.fragment
+def create_temporal_comparison(df: pd.DataFrame, players: List[str]):
+    """Cria gráfico de comparação temporal"""
+
+    st.markdown("##### 📈 Performance ao Longo do Tempo")
+
+    # Preparar dados por semana/temporada
+    temporal_data = df.groupby(['player_display_name', 'season', 'week'], observed=True, sort=False).agg({
+        'fantasy_points_ppr': 'sum'
+    }).reset_index()
+
+    # Chave de ordenação inteira (season*100 + week): ordenar por uma coluna
+    # int32 é mais barato que por duas, e dispensa o antigo game_id de strings
+    # concatenadas, que nunca chegava aos gráficos
+    temporal_data['order_key'] = (
+        temporal_data['season'].to_numpy(dtype=np.int32) * 100
+        + temporal_data['week'].to_numpy(dtype=np.int32)
+    )
+
+    # Ordenar uma vez e calcular a média móvel de todos os jogadores num único
+    # rolling agrupado, em vez de re-filtrar e re-ordenar por jogador no loop
+    temporal_sorted = temporal_data.sort_values(['player_display_name', 'order_key'])
+    rolling = temporal_sorted.groupby('player_display_name', observed=True, sort=False)['fantasy_points_ppr'] \
+        .rolling(window=5, min_periods=1)
+
+    # Kernel JIT do numba quando disponível (já aquecido no cache_resource)
+    if _numba_rolling_ready():
+        moving_avg = rolling.mean(engine='numba',
+                                  engine_kwargs={'nopython': True, 'parallel': False})
+    else:
+        moving_avg = rolling.mean()
+
+    # float32 corta pela metade os bytes que o Plotly serializa para o browser
+    temporal_sorted['moving_avg'] = moving_avg.to_numpy(dtype=np.float32, copy=False)
+
+    # Índice de jogo por jogador, vetorizado: vira o eixo x do formato longo
+    temporal_sorted['game_idx'] = temporal_sorted \
+        .groupby('player_display_name', observed=True, sort=False).cumcount()
+
+    # Figuras cacheadas: reruns com a mesma seleção pulam a montagem dos traces
+    st.plotly_chart(_build_temporal_figure(temporal_sorted, tuple(players)),
+                    use_container_width=True)
+
+    # Gráfico de média móvel
+    st.markdown("##### 📊 Média Móvel (5 jogos)")
+
+    st.plotly_chart(_build_moving_avg_figure(temporal_sorted, tuple(players)),
+                    use_container_width=True)
+
+@st.fragment
+def create_stats_comparison(player_averages: pd.DataFrame, players: List[str], position: str):
+    """Cria comparação de estatísticas médias (médias pré-agregadas)"""
+
     st.markdown("##### 📊 Comparação de Estatísticas Médias")
-    
-    # Definir métricas relevantes por posição
-    position_metrics = {
-        'QB': ['fantasy_points_ppr', 'passing_yards', 'passing_tds', 'interceptions', 'rushing_yards'],
-        'RB': ['fantasy_points_ppr', 'rushing_yards', 'rushing_tds', 'receptions', 'receiving_yards'],
-        'WR': ['fantasy_points_ppr', 'receptions', 'receiving_yards', 'receiving_tds', 'targets'],
-        'TE': ['fantasy_points_ppr', 'receptions', 'receiving_yards', 'receiving_tds', 'targets']
-    }
-    
-    metrics = position_metrics.get(position, ['fantasy_points_ppr'])
-    
-    # Calcular médias por jogador
-    player_averages = df.groupby('player_display_name')[metrics].mean().reset_index()
-    player_averages = player_averages[player_averages['player_display_name'].isin(players)]
+
+    metrics = _POSITION_METRICS.get(position, ['fantasy_points_ppr'])
     
     # Criar gráfico de radar
     fig = go.Figure()
@@ -227,8 +409,9 @@ def create_stats_comparison(df: pd.DataFrame, players: List[str], position: str)
         player_data = player_averages[player_averages['player_display_name'] == player]
         
         if not player_data.empty:
-            values = [player_data[metric].iloc[0] for metric in metrics]
-            
+            values = player_data[metrics].to_numpy(dtype=np.float32, copy=False)[0]
+
+
             fig.add_trace(go.Scatterpolar(
                 r=values,
                 theta=metrics,
@@ -242,7 +425,7 @@ def create_stats_comparison(df: pd.DataFrame, players: List[str], position: str)
         polar=dict(
             radialaxis=dict(
                 visible=True,
-                range=[0, max([player_averages[metric].max() for metric in metrics])]
+                range=[0, float(np.nanmax(player_averages[metrics].to_numpy(dtype=np.float32)))]
             )
         ),
         title="Comparação de Estatísticas (Gráfico Radar)",
@@ -281,18 +464,17 @@ def create_stats_comparison(df: pd.DataFrame, players: List[str], position: str)
     
     st.plotly_chart(fig_bar, use_container_width=True)
 
-def create_consistency_comparison(df: pd.DataFrame, players: List[str]):
-    """Cria comparação de consistência"""
-    
+@st.fragment
+def create_consistency_comparison(player_stats: pd.DataFrame, players: List[str]):
+    """Cria comparação de consistência (a partir do agregado compartilhado)"""
+
     st.markdown("##### 🎯 Análise de Consistência")
-    
-    # Calcular métricas de consistência
-    consistency_data = df.groupby('player_display_name').agg({
-        'fantasy_points_ppr': ['mean', 'std', 'min', 'max', 'count']
-    }).reset_index()
-    
-    consistency_data.columns = ['player', 'avg', 'std', 'min', 'max', 'games']
-    consistency_data = consistency_data[consistency_data['player'].isin(players)]
+
+    # Recortar as métricas de consistência do agregado compartilhado
+    consistency_data = player_stats[
+        ['player', 'avg_points', 'std_points', 'min_points', 'max_points', 'games']
+    ].rename(columns={'avg_points': 'avg', 'std_points': 'std',
+                      'min_points': 'min', 'max_points': 'max'})
     
     # Calcular métricas adicionais
     consistency_data['cv'] = consistency_data['std'] / consistency_data['avg']  # Coeficiente de variação
@@ -325,18 +507,23 @@ def create_consistency_comparison(df: pd.DataFrame, players: List[str]):
     
     # Gráfico de floor vs ceiling
     fig_range = go.Figure()
-    
+
     colors = ['#e74c3c', '#3498db', '#f1c40f', '#27ae60', '#9b59b6']
-    
+
+    # Colunas como arrays NumPy: o loop de traces usa indexação posicional
+    # em vez de filtros booleanos e .iloc por jogador
+    c_avg = consistency_data['avg'].to_numpy(dtype=np.float32, copy=False)
+    c_floor = consistency_data['floor'].to_numpy(dtype=np.float32, copy=False)
+    c_ceiling = consistency_data['ceiling'].to_numpy(dtype=np.float32, copy=False)
+    row_of = {name: idx for idx, name in enumerate(consistency_data['player'])}
+
     for i, player in enumerate(players):
-        player_data = consistency_data[consistency_data['player'] == player]
-        
-        if not player_data.empty:
-            row = player_data.iloc[0]
-            
+        idx = row_of.get(player)
+
+        if idx is not None:
             # Barra do floor ao ceiling
             fig_range.add_trace(go.Scatter(
-                x=[row['floor'], row['ceiling']],
+                x=[c_floor[idx], c_ceiling[idx]],
                 y=[player, player],
                 mode='lines+markers',
                 name=f"{player} Range",
@@ -344,10 +531,10 @@ def create_consistency_comparison(df: pd.DataFrame, players: List[str]):
                 marker=dict(size=8),
                 showlegend=False
             ))
-            
+
             # Ponto da média
             fig_range.add_trace(go.Scatter(
-                x=[row['avg']],
+                x=[c_avg[idx]],
                 y=[player],
                 mode='markers',
                 name=f"{player} Média",
@@ -371,24 +558,17 @@ def create_consistency_comparison(df: pd.DataFrame, players: List[str]):
     
     st.plotly_chart(fig_range, use_container_width=True)
 
-def create_head_to_head_comparison(df: pd.DataFrame, players: List[str]):
-    """Cria comparação head-to-head"""
-    
+@st.fragment
+def create_head_to_head_comparison(player_stats: pd.DataFrame, players: List[str]):
+    """Cria comparação head-to-head (a partir do agregado compartilhado)"""
+
     st.markdown("##### 📋 Comparação Head-to-Head")
-    
-    # Calcular estatísticas detalhadas
-    detailed_stats = df.groupby('player_display_name').agg({
-        'fantasy_points_ppr': ['sum', 'mean', 'std', 'min', 'max', 'count'],
-        'season': ['min', 'max']
-    }).reset_index()
-    
-    # Flatten column names
-    detailed_stats.columns = [
-        'player', 'total_points', 'avg_points', 'std_points', 'min_points', 
-        'max_points', 'games', 'first_season', 'last_season'
-    ]
-    
-    detailed_stats = detailed_stats[detailed_stats['player'].isin(players)]
+
+    # O agregado compartilhado já traz totais, extremos e temporadas min/max
+    detailed_stats = player_stats[
+        ['player', 'total_points', 'avg_points', 'std_points', 'min_points',
+         'max_points', 'games', 'first_season', 'last_season']
+    ].copy()
     
     # Calcular métricas adicionais
     detailed_stats['cv'] = detailed_stats['std_points'] / detailed_stats['avg_points']
@@ -418,15 +598,23 @@ def create_head_to_head_comparison(df: pd.DataFrame, players: List[str]):
     
     display_stats = display_stats.rename(columns=column_mapping)
     
-    # Destacar o melhor em cada categoria
+    # Destacar o melhor em cada categoria com uma grade de CSS pré-computada:
+    # um argmax/argmin vetorizado por grupo de colunas substitui o caminho
+    # célula a célula de highlight_max/highlight_min no Styler
+    max_cols = ['Total PPR', 'Média PPR', 'Máximo', 'PPR/Temporada']
+    min_cols = ['Desvio Padrão', 'Mínimo', 'Coef. Variação']
+
+    css_grid = pd.DataFrame('', index=display_stats.index, columns=display_stats.columns)
+    col_pos = {col: i for i, col in enumerate(display_stats.columns)}
+
+    for col, row_idx in zip(max_cols, display_stats[max_cols].to_numpy().argmax(axis=0)):
+        css_grid.iloc[row_idx, col_pos[col]] = 'background-color: lightgreen'
+
+    for col, row_idx in zip(min_cols, display_stats[min_cols].to_numpy().argmin(axis=0)):
+        css_grid.iloc[row_idx, col_pos[col]] = 'background-color: lightblue'
+
     st.dataframe(
-        display_stats.style.highlight_max(
-            subset=['Total PPR', 'Média PPR', 'Máximo', 'PPR/Temporada'],
-            color='lightgreen'
-        ).highlight_min(
-            subset=['Desvio Padrão', 'Mínimo', 'Coef. Variação'],
-            color='lightblue'
-        ),
+        display_stats.style.apply(lambda _: css_grid, axis=None),
         use_container_width=True
     )
     
@@ -439,61 +627,54 @@ def create_head_to_head_comparison(df: pd.DataFrame, players: List[str]):
         'Consistência (menor CV)': 'cv',
         'Maior Upside (máximo)': 'max_points'
     }
-    
+
+    # Matriz pequena (jogadores × categorias): um argsort por coluna substitui
+    # os nlargest/nsmallest + iterrows de cada categoria
+    ranking_names = detailed_stats['player'].to_numpy()
+    ranking_values = detailed_stats[list(categories.values())].to_numpy()
+
+    def _render_ranking(category: str, column: str, col_idx: int):
+        st.markdown(f"**{category}:**")
+
+        col_values = ranking_values[:, col_idx]
+        # CV ranqueia do menor para o maior; as demais, do maior para o menor
+        order = np.argsort(col_values if column == 'cv' else -col_values, kind='stable')
+
+        for rank, idx in enumerate(order, 1):
+            st.write(f"{rank}. {ranking_names[idx]}: {col_values[idx]:.2f}")
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        for i, (category, column) in enumerate(list(categories.items())[:2]):
-            st.markdown(f"**{category}:**")
-            
-            if column == 'cv':
-                ranking = detailed_stats.nsmallest(len(players), column)
-            else:
-                ranking = detailed_stats.nlargest(len(players), column)
-            
-            for rank, (_, player) in enumerate(ranking.iterrows(), 1):
-                value = player[column]
-                st.write(f"{rank}. {player['player']}: {value:.2f}")
-    
+        for col_idx, (category, column) in enumerate(list(categories.items())[:2]):
+            _render_ranking(category, column, col_idx)
+
     with col2:
-        for i, (category, column) in enumerate(list(categories.items())[2:]):
-            st.markdown(f"**{category}:**")
-            
-            if column == 'cv':
-                ranking = detailed_stats.nsmallest(len(players), column)
-            else:
-                ranking = detailed_stats.nlargest(len(players), column)
-            
-            for rank, (_, player) in enumerate(ranking.iterrows(), 1):
-                value = player[column]
-                st.write(f"{rank}. {player['player']}: {value:.2f}")
-
-def create_comparison_table(df: pd.DataFrame, players: List[str]):
+        for col_idx, (category, column) in enumerate(list(categories.items())[2:], start=2):
+            _render_ranking(category, column, col_idx)
+
+def create_comparison_table(df: pd.DataFrame, players: List[str], player_stats: pd.DataFrame):
     """Cria tabela detalhada de comparação"""
     
     st.markdown("#### 📋 Tabela Detalhada de Comparação")
     
-    # Calcular estatísticas por temporada para cada jogador
-    season_stats = df.groupby(['player_display_name', 'season']).agg({
-        'fantasy_points_ppr': ['sum', 'mean', 'count'],
-        'games': 'sum'
-    }).reset_index()
-    
-    season_stats.columns = ['player', 'season', 'total_points', 'avg_points', 'games']
-    season_stats = season_stats[season_stats['player'].isin(players)]
-    
-    # Pivot para mostrar temporadas como colunas
-    pivot_table = season_stats.pivot(index='player', columns='season', values='total_points').fillna(0)
+    # Só o total por temporada é exibido: projetar uma única coluna e somar,
+    # em vez de agregar sum/mean/count que eram descartados em seguida.
+    # O unstack reorganiza o índice agrupado direto em temporadas-coluna.
+    pivot_table = df.groupby(['player_display_name', 'season'], observed=True, sort=False)['fantasy_points_ppr'] \
+        .sum().unstack('season', fill_value=0)
+    pivot_table.index.name = 'player'
     
     st.dataframe(pivot_table, use_container_width=True)
     
     # Resumo estatístico
     st.markdown("#### 📈 Resumo Estatístico")
     
-    summary_stats = df[df['player_display_name'].isin(players)].groupby('player_display_name').agg({
-        'fantasy_points_ppr': ['count', 'sum', 'mean', 'std', 'min', 'max'],
-    }).round(2)
-    
+    # Fatiar o agregado já calculado na interface em vez de refazer o groupby
+    summary_stats = player_stats.set_index('player').loc[
+        players, ['games', 'total_points', 'avg_points', 'std_points', 'min_points', 'max_points']
+    ].round(2)
+
     summary_stats.columns = ['Jogos', 'Total PPR', 'Média PPR', 'Desvio Padrão', 'Mínimo', 'Máximo']
     
     st.dataframe(summary_stats, use_container_width=True)
@@ -7,14 +7,30 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import streamlit as st
 from typing import Dict, List, Optional
 
+# Polars é opcional: quando instalado, as somas por temporada rodam nos
+# kernels colunares multi-thread dele; sem ele, vale o caminho pandas
+try:
+    import polars as pl
+    _HAS_POLARS = True
+except ImportError:
+    _HAS_POLARS = False
+
+# orjson é opcional: serializa os payloads numéricos das figuras em C,
+# e é o que domina o tempo de render das figuras grandes no Streamlit
+try:
+    pio.json.config.default_engine = 'orjson'
+except ValueError:
+    pass
+
 # Paleta de cores baseada no design de referência
 COLORS = {
     'primary': '#e74c3c',
-    'secondary': '#3498db', 
+    'secondary': '#3498db',
     'accent': '#f1c40f',
     'dark_blue': '#1e3a5f',
     'light_blue': '#3498db',
@@ -23,43 +39,133 @@ COLORS = {
     'danger': '#e74c3c'
 }
 
-def create_player_timeline_chart(player_data: pd.DataFrame, metric: str = 'fantasy_points_ppr'):
-    """Cria gráfico de linha temporal do jogador similar ao design de referência"""
-    
-    # Preparar dados por temporada
-    season_data = player_data.groupby('season').agg({
+def _df_cache_key(df: pd.DataFrame):
+    """Chave leve de cache para frames grandes (evita hashear linha a linha)"""
+
+    season_max = int(df['season'].max()) if 'season' in df.columns and len(df) else 0
+    points_sum = float(df['fantasy_points_ppr'].sum()) if 'fantasy_points_ppr' in df.columns else 0.0
+
+    return (df.shape, season_max, points_sum)
+
+def _agg_cache_key(df: pd.DataFrame):
+    """Chave de cache para agregados pequenos: checksum do conteúdo numérico"""
+
+    numeric = df.select_dtypes('number')
+    checksum = float(np.nansum(numeric.to_numpy(dtype='float64'))) if not numeric.empty else 0.0
+
+    return (df.shape, tuple(df.columns), checksum)
+
+# Agregações: cache keyed pelo fingerprint do frame de entrada + args;
+# figuras: cache_resource (Figure é mutável) keyed pelo agregado pequeno
+_AGG_CACHE = dict(show_spinner=False, max_entries=32,
+                  hash_funcs={pd.DataFrame: _df_cache_key})
+_FIG_CACHE = dict(show_spinner=False, max_entries=32,
+                  hash_funcs={pd.DataFrame: _agg_cache_key})
+
+def _empty_fig(title: str) -> go.Figure:
+    """Figura vazia para filtros sem dados (evita o pipeline e os crashes
+    de agregações/max sobre frames vazios)"""
+
+    return go.Figure().update_layout(
+        title=title,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        height=400
+    )
+
+@st.cache_data(**_AGG_CACHE)
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as chaves de agrupamento para Categorical (uma vez por dataset)
+
+    groupby sobre Categorical opera em códigos inteiros em vez de hashear
+    strings linha a linha, que domina o custo nos agrupamentos deste módulo.
+    """
+
+    df = df.copy()
+
+    for col in ('position', 'player_id', 'player_display_name'):
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+
+    # Tipos compactos: int32/float32 cobrem com folga estatísticas de box
+    # score e cortam pela metade os bytes movidos por cada groupby/sum/mean
+    for col in ('passing_tds', 'rushing_tds', 'receiving_tds',
+                'interceptions', 'fumbles_lost', 'week', 'season'):
+        if col in df.columns:
+            if df[col].dtype.kind in 'iu':
+                df[col] = df[col].astype('int32')
+            elif df[col].dtype == np.float64:
+                df[col] = df[col].astype('float32')
+
+    if 'fantasy_points_ppr' in df.columns:
+        df['fantasy_points_ppr'] = df['fantasy_points_ppr'].astype(np.float32)
+
+    # Garantir colunas numéricas contíguas: quando o frame veio de um bloco
+    # row-major, cada coluna é uma view com stride e as agregações coluna a
+    # coluna perdem localidade de cache
+    for col in df.select_dtypes('number').columns:
+        values = df[col].to_numpy()
+        if not values.flags['C_CONTIGUOUS']:
+            df[col] = np.ascontiguousarray(values)
+
+    return df
+
+@st.cache_data(**_AGG_CACHE)
+def _by_position(df: pd.DataFrame) -> Dict:
+    """Particiona o dataset por posição uma única vez (dict de sub-frames)
+
+    Um único scan do groupby substitui um filtro booleano por posição a cada
+    gráfico, e entrega sub-frames contíguos para as agregações seguintes.
+    """
+
+    return {pos: group for pos, group in df.groupby('position', observed=True, sort=False)}
+
+@st.cache_data(**_AGG_CACHE)
+def _agg_player_timeline(player_data: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """Agrega a métrica do jogador por temporada"""
+
+    # Projetar só as colunas usadas antes do groupby: o agrupamento deixa de
+    # arrastar o frame inteiro pela memória
+    season_data = player_data[['season', metric, 'week']].groupby('season', sort=False).agg({
         metric: 'mean',
         'week': 'count'  # Usar 'week' em vez de 'games' que não existe
     }).reset_index()
     season_data.columns = ['season', metric, 'games']
-    
+
+    # A linha do gráfico conecta os pontos na ordem dos dados
+    return season_data.sort_values('season')
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_player_timeline(season_data: pd.DataFrame, metric: str) -> go.Figure:
+    """Monta o gráfico de linha temporal a partir do agregado por temporada"""
+
     fig = go.Figure()
-    
+
     # Linha principal
     fig.add_trace(go.Scatter(
-        x=season_data['season'],
-        y=season_data[metric],
+        x=season_data['season'].to_numpy(),
+        y=season_data[metric].to_numpy(),
         mode='lines+markers',
         line=dict(color=COLORS['primary'], width=3),
         marker=dict(size=8, color=COLORS['primary']),
         name=metric.replace('_', ' ').title(),
-        hovertemplate='<b>%{x}</b><br>' + 
+        hovertemplate='<b>%{x}</b><br>' +
                      f'{metric.replace("_", " ").title()}: %{{y:.1f}}<br>' +
                      '<extra></extra>'
     ))
-    
-    # Adicionar anotações nos pontos
-    for _, row in season_data.iterrows():
-        fig.add_annotation(
-            x=row['season'],
-            y=row[metric],
-            text=f"{row[metric]:.1f}",
-            showarrow=False,
-            yshift=15,
-            font=dict(color='white', size=10)
-        )
-    
+
+    # Anotações em lote: uma compreensão sobre os arrays substitui o
+    # add_annotation linha a linha via iterrows
+    annotations = [
+        dict(x=season, y=value, text=f"{value:.1f}", showarrow=False, yshift=15,
+             font=dict(color='white', size=10))
+        for season, value in zip(season_data['season'].to_numpy(),
+                                 season_data[metric].to_numpy())
+    ]
+
     fig.update_layout(
+        annotations=annotations,
         title=f"{metric.replace('_', ' ').title()} por Temporada",
         xaxis_title="Temporada",
         yaxis_title=metric.replace('_', ' ').title(),
@@ -69,47 +175,66 @@ def create_player_timeline_chart(player_data: pd.DataFrame, metric: str = 'fanta
         showlegend=False,
         height=400
     )
-    
+
     fig.update_xaxes(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
     fig.update_yaxes(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
-    
+
     return fig
 
-def create_dual_bar_chart(player_data: pd.DataFrame, metric1: str, metric2: str):
-    """Cria gráfico de barras duplas similar ao design de referência"""
-    
-    # Preparar dados por temporada
-    season_data = player_data.groupby('season').agg({
-        metric1: 'sum',
-        metric2: 'sum'
-    }).reset_index()
-    
+def create_player_timeline_chart(player_data: pd.DataFrame, metric: str = 'fantasy_points_ppr'):
+    """Cria gráfico de linha temporal do jogador similar ao design de referência"""
+
+    return _fig_player_timeline(_agg_player_timeline(player_data, metric), metric)
+
+@st.cache_data(**_AGG_CACHE)
+def _agg_dual_bar(player_data: pd.DataFrame, metric1: str, metric2: str) -> pd.DataFrame:
+    """Agrega as duas métricas do jogador por temporada"""
+
+    if _HAS_POLARS:
+        return (
+            pl.from_pandas(player_data[['season', metric1, metric2]], rechunk=True)
+            .group_by('season')
+            .agg([pl.sum(metric1), pl.sum(metric2)])
+            .sort('season')
+            .to_pandas()
+        )
+
+    return player_data[['season', metric1, metric2]] \
+        .groupby('season', sort=False).sum().reset_index()
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_dual_bar(season_data: pd.DataFrame, metric1: str, metric2: str) -> go.Figure:
+    """Monta o gráfico de barras duplas a partir do agregado por temporada"""
+
     fig = go.Figure()
-    
+
+    # Rótulos pré-formatados em uma passada: evita o repr por elemento do
+    # Plotly ao serializar Series como texto
+    text1 = [f"{v:.1f}" for v in season_data[metric1].to_numpy()]
+    text2 = [f"{v:.1f}" for v in season_data[metric2].to_numpy()]
+
     # Barras do primeiro métrica (vermelho)
     fig.add_trace(go.Bar(
-        x=season_data['season'],
-        y=season_data[metric1],
+        x=season_data['season'].to_numpy(),
+        y=season_data[metric1].to_numpy(),
         name=metric1.replace('_', ' ').title(),
-        marker_color=COLORS['primary'],
-        opacity=0.8,
-        text=season_data[metric1],
+        marker=dict(color=COLORS['primary'], opacity=0.8),
+        text=text1,
         textposition='inside',
         textfont=dict(color='white', size=10)
     ))
-    
+
     # Barras do segundo métrica (azul)
     fig.add_trace(go.Bar(
-        x=season_data['season'],
-        y=season_data[metric2],
+        x=season_data['season'].to_numpy(),
+        y=season_data[metric2].to_numpy(),
         name=metric2.replace('_', ' ').title(),
-        marker_color=COLORS['secondary'],
-        opacity=0.8,
-        text=season_data[metric2],
+        marker=dict(color=COLORS['secondary'], opacity=0.8),
+        text=text2,
         textposition='inside',
         textfont=dict(color='white', size=10)
     ))
-    
+
     fig.update_layout(
         title=f"{metric1.replace('_', ' ').title()} vs {metric2.replace('_', ' ').title()}",
         xaxis_title="Temporada",
@@ -120,72 +245,92 @@ def create_dual_bar_chart(player_data: pd.DataFrame, metric1: str, metric2: str)
         barmode='group',
         height=400
     )
-    
+
     return fig
 
-def create_stacked_bar_with_line(player_data: pd.DataFrame):
-    """Cria gráfico de barras empilhadas com linha similar ao TD/TO Ratio"""
-    
-    # Preparar dados por temporada
-    season_data = player_data.groupby('season').agg({
-        'passing_tds': 'sum',
-        'rushing_tds': 'sum',
-        'receiving_tds': 'sum',
-        'interceptions': 'sum',
-        'fumbles_lost': 'sum'
-    }).reset_index()
-    
-    # Calcular TDs totais e TOs totais
-    season_data['total_tds'] = (season_data['passing_tds'] + 
-                               season_data['rushing_tds'] + 
-                               season_data['receiving_tds'])
-    
-    season_data['total_tos'] = (season_data['interceptions'] + 
-                               season_data['fumbles_lost'])
-    
-    # Calcular ratio (evitar divisão por zero)
-    season_data['td_to_ratio'] = np.where(
-        season_data['total_tos'] > 0,
-        season_data['total_tds'] / season_data['total_tos'],
-        season_data['total_tds']
-    )
-    
+def create_dual_bar_chart(player_data: pd.DataFrame, metric1: str, metric2: str):
+    """Cria gráfico de barras duplas similar ao design de referência"""
+
+    return _fig_dual_bar(_agg_dual_bar(player_data, metric1, metric2), metric1, metric2)
+
+@st.cache_data(**_AGG_CACHE)
+def _agg_td_to_ratio(player_data: pd.DataFrame) -> pd.DataFrame:
+    """Agrega touchdowns/turnovers por temporada e calcula o ratio"""
+
+    td_cols = ['passing_tds', 'rushing_tds', 'receiving_tds', 'interceptions', 'fumbles_lost']
+
+    if _HAS_POLARS:
+        season_data = (
+            pl.from_pandas(player_data[['season'] + td_cols], rechunk=True)
+            .group_by('season')
+            .agg([pl.sum(col) for col in td_cols])
+            .sort('season')
+            .to_pandas()
+        )
+    else:
+        season_data = player_data[['season'] + td_cols] \
+            .groupby('season', sort=False).sum().reset_index().sort_values('season')
+
+    # Calcular TDs totais e TOs totais: soma por linha direto nos arrays,
+    # sem as Series intermediárias (e o alinhamento de índice) da soma em cadeia
+    tds = season_data[['passing_tds', 'rushing_tds', 'receiving_tds']] \
+        .to_numpy(dtype=np.float64).sum(axis=1)
+    tos = season_data[['interceptions', 'fumbles_lost']] \
+        .to_numpy(dtype=np.float64).sum(axis=1)
+    season_data['total_tds'] = tds
+    season_data['total_tos'] = tos
+
+    # Calcular ratio com divisão mascarada: o np.divide com where só divide
+    # nas temporadas com turnover, sem a divisão por zero (e o warning) que o
+    # np.where avaliava mesmo nas linhas descartadas; sem TOs, fica o total de TDs
+    ratio = tds.copy()
+    np.divide(tds, tos, out=ratio, where=tos > 0)
+    season_data['td_to_ratio'] = ratio
+
+    return season_data
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_td_to_ratio(season_data: pd.DataFrame) -> go.Figure:
+    """Monta o gráfico de barras + linha de ratio a partir do agregado"""
+
     # Criar subplot com eixo Y secundário
     fig = make_subplots(specs=[[{"secondary_y": True}]])
-    
+
+    # Rótulos pré-formatados em uma passada (contagens inteiras)
+    text_tds = [f"{v:.0f}" for v in season_data['total_tds'].to_numpy()]
+    text_tos = [f"{v:.0f}" for v in season_data['total_tos'].to_numpy()]
+
     # Barras empilhadas para TDs
     fig.add_trace(
         go.Bar(
-            x=season_data['season'],
-            y=season_data['total_tds'],
+            x=season_data['season'].to_numpy(),
+            y=season_data['total_tds'].to_numpy(),
             name='Touchdowns',
-            marker_color=COLORS['secondary'],
-            opacity=0.8,
-            text=season_data['total_tds'],
+            marker=dict(color=COLORS['secondary'], opacity=0.8),
+            text=text_tds,
             textposition='inside'
         ),
         secondary_y=False
     )
-    
+
     # Barras empilhadas para TOs
     fig.add_trace(
         go.Bar(
-            x=season_data['season'],
-            y=season_data['total_tos'],
+            x=season_data['season'].to_numpy(),
+            y=season_data['total_tos'].to_numpy(),
             name='Turnovers',
-            marker_color=COLORS['primary'],
-            opacity=0.8,
-            text=season_data['total_tos'],
+            marker=dict(color=COLORS['primary'], opacity=0.8),
+            text=text_tos,
             textposition='inside'
         ),
         secondary_y=False
     )
-    
+
     # Linha para ratio
     fig.add_trace(
         go.Scatter(
-            x=season_data['season'],
-            y=season_data['td_to_ratio'],
+            x=season_data['season'].to_numpy(),
+            y=season_data['td_to_ratio'].to_numpy(),
             mode='lines+markers',
             name='TD/TO Ratio',
             line=dict(color=COLORS['accent'], width=3),
@@ -194,12 +339,12 @@ def create_stacked_bar_with_line(player_data: pd.DataFrame):
         ),
         secondary_y=True
     )
-    
+
     # Configurar eixos
     fig.update_xaxes(title_text="Temporada")
     fig.update_yaxes(title_text="Touchdowns / Turnovers", secondary_y=False)
     fig.update_yaxes(title_text="TD/TO Ratio", secondary_y=True)
-    
+
     fig.update_layout(
         title="Análise de Touchdowns vs Turnovers",
         plot_bgcolor='rgba(0,0,0,0)',
@@ -208,36 +353,52 @@ def create_stacked_bar_with_line(player_data: pd.DataFrame):
         height=400,
         barmode='group'
     )
-    
+
     return fig
 
-def create_consistency_chart(df: pd.DataFrame, position: str):
-    """Cria gráfico de consistência por posição"""
-    
-    pos_data = df[df['position'] == position].copy()
-    
-    # Calcular métricas de consistência por jogador
-    consistency_data = pos_data.groupby('player_display_name').agg({
-        'fantasy_points_ppr': ['mean', 'std', 'count']
-    }).reset_index()
-    
-    consistency_data.columns = ['player', 'avg_points', 'std_points', 'games']
-    
+def create_stacked_bar_with_line(player_data: pd.DataFrame):
+    """Cria gráfico de barras empilhadas com linha similar ao TD/TO Ratio"""
+
+    return _fig_td_to_ratio(_agg_td_to_ratio(player_data))
+
+@st.cache_data(**_AGG_CACHE)
+def _agg_consistency(df: pd.DataFrame, position: str) -> pd.DataFrame:
+    """Agrega métricas de consistência da posição e recorta o top 20"""
+
+    # Reutilizar a partição por posição cacheada (sem re-escanear o frame)
+    pos_data = _by_position(df).get(position, df.iloc[0:0])[
+        ['player_display_name', 'fantasy_points_ppr']
+    ]
+
+    # Agregação nomeada: uma passada fundida por grupo, já com os nomes
+    # finais — sem MultiIndex para achatar depois
+    consistency_data = pos_data.groupby('player_display_name', observed=True, sort=False).agg(
+        avg_points=('fantasy_points_ppr', 'mean'),
+        std_points=('fantasy_points_ppr', 'std'),
+        games=('fantasy_points_ppr', 'count')
+    ).reset_index().rename(columns={'player_display_name': 'player'})
+
     # Filtrar jogadores com pelo menos 8 jogos
     consistency_data = consistency_data[consistency_data['games'] >= 8]
-    
-    # Calcular coeficiente de variação (menor = mais consistente)
-    consistency_data['cv'] = consistency_data['std_points'] / consistency_data['avg_points']
-    
+
+    # Coeficiente de variação (menor = mais consistente) com divisão mascarada
+    avg = consistency_data['avg_points'].to_numpy(dtype=np.float64)
+    std = consistency_data['std_points'].to_numpy(dtype=np.float64)
+    consistency_data['cv'] = np.divide(std, avg, out=np.zeros(len(avg)), where=avg > 0)
+
     # Top 20 jogadores por média de pontos
-    top_players = consistency_data.nlargest(20, 'avg_points')
-    
+    return consistency_data.nlargest(20, 'avg_points')
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_consistency(top_players: pd.DataFrame, position: str) -> go.Figure:
+    """Monta o scatter de consistência a partir do top 20 agregado"""
+
     fig = go.Figure()
-    
+
     # Scatter plot
     fig.add_trace(go.Scatter(
-        x=top_players['avg_points'],
-        y=top_players['cv'],
+        x=top_players['avg_points'].to_numpy(),
+        y=top_players['cv'].to_numpy(),
         mode='markers+text',
         marker=dict(
             size=top_players['games'],
@@ -257,7 +418,7 @@ def create_consistency_chart(df: pd.DataFrame, position: str):
                      'Jogos: %{marker.size}<br>' +
                      '<extra></extra>'
     ))
-    
+
     fig.update_layout(
         title=f"Consistência vs Performance - {position}",
         xaxis_title="Média Fantasy Points PPR",
@@ -267,48 +428,84 @@ def create_consistency_chart(df: pd.DataFrame, position: str):
         font_color='white',
         height=500
     )
-    
+
     return fig
 
-def create_rookie_analysis_chart(df: pd.DataFrame):
-    """Cria análise de performance de rookies vs veteranos"""
-    
-    # Identificar rookies (primeira temporada de cada jogador)
-    player_first_season = df.groupby('player_id')['season'].min().reset_index()
-    player_first_season.columns = ['player_id', 'rookie_season']
-    
-    df_with_rookie = df.merge(player_first_season, on='player_id', how='left')
-    df_with_rookie['is_rookie'] = df_with_rookie['season'] == df_with_rookie['rookie_season']
-    
-    # Análise por posição
-    rookie_analysis = df_with_rookie.groupby(['position', 'is_rookie']).agg({
-        'fantasy_points_ppr': 'mean'
-    }).reset_index()
-    
-    # Pivot para facilitar visualização
-    rookie_pivot = rookie_analysis.pivot(index='position', columns='is_rookie', values='fantasy_points_ppr').reset_index()
-    rookie_pivot.columns = ['position', 'veteran_avg', 'rookie_avg']
-    
+def create_consistency_chart(df: pd.DataFrame, position: str):
+    """Cria gráfico de consistência por posição"""
+
+    top_players = _agg_consistency(_normalize(df), position)
+
+    # Sem jogador com 8+ jogos não há o que plotar (e o sizeref da figura
+    # faria max() sobre uma coluna vazia)
+    if len(top_players) == 0:
+        return _empty_fig(f"Consistência vs Performance - {position} (sem dados)")
+
+    return _fig_consistency(top_players, position)
+
+@st.cache_data(**_AGG_CACHE)
+def _season_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Tabela compacta por (player_id, position, season) reutilizada entre gráficos
+
+    Uma única passada sobre as linhas semanais alimenta os gráficos que
+    operam em granularidade de temporada, que passam a agrupar milhares de
+    linhas em vez de milhões. (Mantém só as métricas de PPR/jogos que os
+    consumidores atuais usam.)
+    """
+
+    return df[['player_id', 'position', 'season', 'week', 'fantasy_points_ppr']] \
+        .groupby(['player_id', 'position', 'season'], observed=True, sort=False).agg(
+            ppr_mean=('fantasy_points_ppr', 'mean'),
+            ppr_sum=('fantasy_points_ppr', 'sum'),
+            games=('week', 'count')
+        ).reset_index()
+
+@st.cache_data(**_AGG_CACHE)
+def _agg_rookie_analysis(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega a média rookie vs veterano por posição"""
+
+    # Operar sobre o resumo por temporada (compartilhado entre gráficos)
+    summary = _season_summary(df)
+
+    # Identificar rookies: transform('min') difunde a primeira temporada na
+    # forma original sem o merge de volta sobre o frame inteiro
+    rookie_season = summary.groupby('player_id', observed=True, sort=False)['season'].transform('min')
+    is_rookie = summary['season'].to_numpy() == rookie_season.to_numpy()
+
+    # Soma de pontos e jogos por (posição, rookie): a razão reproduz a média
+    # sobre as linhas semanais originais
+    grouped = summary.assign(is_rookie=is_rookie) \
+        .groupby(['position', 'is_rookie'], observed=True, sort=False)[['ppr_sum', 'games']].sum()
+
+    rookie_pivot = (grouped['ppr_sum'] / grouped['games']).unstack('is_rookie') \
+        .rename(columns={False: 'veteran_avg', True: 'rookie_avg'}).reset_index()
+
+    return rookie_pivot
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_rookie_analysis(rookie_pivot: pd.DataFrame) -> go.Figure:
+    """Monta o gráfico rookies vs veteranos a partir do agregado"""
+
     fig = go.Figure()
-    
+
     # Barras para veteranos
     fig.add_trace(go.Bar(
         x=rookie_pivot['position'],
-        y=rookie_pivot['veteran_avg'],
+        y=rookie_pivot['veteran_avg'].to_numpy(),
         name='Veteranos',
         marker_color=COLORS['secondary'],
         opacity=0.8
     ))
-    
+
     # Barras para rookies
     fig.add_trace(go.Bar(
         x=rookie_pivot['position'],
-        y=rookie_pivot['rookie_avg'],
+        y=rookie_pivot['rookie_avg'].to_numpy(),
         name='Rookies',
         marker_color=COLORS['primary'],
         opacity=0.8
     ))
-    
+
     fig.update_layout(
         title="Performance Média: Rookies vs Veteranos por Posição",
         xaxis_title="Posição",
@@ -319,24 +516,35 @@ def create_rookie_analysis_chart(df: pd.DataFrame):
         barmode='group',
         height=400
     )
-    
+
     return fig
 
-def create_weekly_trends_chart(df: pd.DataFrame, position: str):
-    """Cria gráfico de tendências semanais por posição"""
-    
-    pos_data = df[df['position'] == position].copy()
-    
-    # Análise por semana da temporada
-    weekly_trends = pos_data.groupby('week').agg({
+def create_rookie_analysis_chart(df: pd.DataFrame):
+    """Cria análise de performance de rookies vs veteranos"""
+
+    return _fig_rookie_analysis(_agg_rookie_analysis(_normalize(df)))
+
+@st.cache_data(**_AGG_CACHE)
+def _agg_weekly_trends(df: pd.DataFrame, position: str) -> pd.DataFrame:
+    """Agrega a média semanal da posição"""
+
+    # Reutilizar a partição por posição cacheada (sem re-escanear o frame)
+    pos_data = _by_position(df).get(position, df.iloc[0:0])[['week', 'fantasy_points_ppr']]
+
+    # Análise por semana da temporada (linha conecta na ordem dos dados)
+    return pos_data.groupby('week', sort=False).agg({
         'fantasy_points_ppr': 'mean'
-    }).reset_index()
-    
+    }).reset_index().sort_values('week')
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_weekly_trends(weekly_trends: pd.DataFrame, position: str) -> go.Figure:
+    """Monta o gráfico de tendência semanal a partir do agregado"""
+
     fig = go.Figure()
-    
+
     fig.add_trace(go.Scatter(
-        x=weekly_trends['week'],
-        y=weekly_trends['fantasy_points_ppr'],
+        x=weekly_trends['week'].to_numpy(),
+        y=weekly_trends['fantasy_points_ppr'].to_numpy(),
         mode='lines+markers',
         line=dict(color=COLORS['primary'], width=3),
         marker=dict(size=6, color=COLORS['primary']),
@@ -344,7 +552,7 @@ def create_weekly_trends_chart(df: pd.DataFrame, position: str):
         fillcolor='rgba(231, 76, 60, 0.1)',
         name=f'{position} Média'
     ))
-    
+
     fig.update_layout(
         title=f"Tendência Semanal - {position}",
         xaxis_title="Semana da Temporada",
@@ -354,50 +562,48 @@ def create_weekly_trends_chart(df: pd.DataFrame, position: str):
         font_color='white',
         height=400
     )
-    
+
     fig.update_xaxes(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
     fig.update_yaxes(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
-    
+
     return fig
 
+def create_weekly_trends_chart(df: pd.DataFrame, position: str):
+    """Cria gráfico de tendências semanais por posição"""
+
+    weekly_trends = _agg_weekly_trends(_normalize(df), position)
+
+    if len(weekly_trends) == 0:
+        return _empty_fig(f"Tendência Semanal - {position} (sem dados)")
+
+    return _fig_weekly_trends(weekly_trends, position)
+
 def create_position_scarcity_chart(df: pd.DataFrame):
     """Cria análise de escassez por posição (posições premium)"""
-    
-    # Calcular distribuição de pontos por posição
-    position_stats = df.groupby('position').agg({
-        'fantasy_points_ppr': ['mean', 'std', 'count']
-    }).reset_index()
-    
-    position_stats.columns = ['position', 'avg_points', 'std_points', 'total_games']
-    
-    # Calcular percentis para análise de escassez
-    percentiles = []
-    for pos in position_stats['position']:
-        pos_data = df[df['position'] == pos]['fantasy_points_ppr']
-        percentiles.append({
-            'position': pos,
-            'p90': pos_data.quantile(0.9),
-            'p75': pos_data.quantile(0.75),
-            'p50': pos_data.quantile(0.5),
-            'p25': pos_data.quantile(0.25),
-            'p10': pos_data.quantile(0.1)
-        })
-    
-    percentiles_df = pd.DataFrame(percentiles)
-    
+
+    df = _normalize(df)
+
+    # Os box plots calculam a distribuição direto dos dados brutos, então a
+    # figura é montada aqui mesmo, sem etapa de agregação separada
     fig = go.Figure()
-    
-    # Box plot para cada posição
-    for pos in percentiles_df['position']:
-        pos_data = df[df['position'] == pos]['fantasy_points_ppr']
-        
+
+    # Dois traces de Box com eixo x categórico: o Plotly agrupa as posições
+    # internamente, sem montar um go.Box (e refatiar o frame) por posição.
+    # O trace separado para QB/TE preserva o destaque das posições premium.
+    pos_points = df[['position', 'fantasy_points_ppr']]
+    premium = pos_points['position'].isin(['QB', 'TE']).to_numpy()
+
+    for mask, color in ((premium, COLORS['primary']), (~premium, COLORS['secondary'])):
+        subset = pos_points.loc[mask]
+
         fig.add_trace(go.Box(
-            y=pos_data,
-            name=pos,
+            x=subset['position'],
+            y=subset['fantasy_points_ppr'].to_numpy(),
             boxpoints='outliers',
-            marker_color=COLORS['primary'] if pos in ['QB', 'TE'] else COLORS['secondary']
+            marker_color=color,
+            showlegend=False
         ))
-    
+
     fig.update_layout(
         title="Distribuição de Fantasy Points por Posição (Análise de Escassez)",
         xaxis_title="Posição",
@@ -407,81 +613,122 @@ def create_position_scarcity_chart(df: pd.DataFrame):
         font_color='white',
         height=500
     )
-    
+
     return fig
 
-def create_breakout_analysis_chart(df: pd.DataFrame):
-    """Cria análise de jogadores breakout (segunda temporada vs primeira)"""
-    
+@st.cache_data(**_AGG_CACHE)
+def _agg_breakout_analysis(df: pd.DataFrame) -> pd.DataFrame:
+    """Compara a primeira e a segunda temporada de cada jogador"""
+
+    # Operar sobre o resumo por temporada: uma linha por (jogador, temporada)
+    # em vez das linhas semanais completas
+    summary = _season_summary(df)
+
     # Identificar jogadores com pelo menos 2 temporadas
-    player_seasons = df.groupby('player_id')['season'].nunique()
-    multi_season_players = player_seasons[player_seasons >= 2].index
-    
-    multi_season_data = df[df['player_id'].isin(multi_season_players)].copy()
-    
-    # Calcular performance por temporada do jogador
-    player_season_rank = multi_season_data.groupby('player_id')['season'].rank(method='dense')
-    multi_season_data['player_season_rank'] = player_season_rank
-    
-    # Comparar primeira vs segunda temporada
-    first_second_comparison = multi_season_data[
-        multi_season_data['player_season_rank'].isin([1, 2])
-    ].groupby(['player_id', 'position', 'player_season_rank']).agg({
-        'fantasy_points_ppr': 'mean'
-    }).reset_index()
-    
-    # Pivot para comparação
-    comparison_pivot = first_second_comparison.pivot(
-        index=['player_id', 'position'], 
-        columns='player_season_rank', 
-        values='fantasy_points_ppr'
-    ).reset_index()
-    
+    season_counts = summary.groupby('player_id', observed=True, sort=False)['season'].transform('size')
+    multi_season_data = summary.loc[season_counts.to_numpy() >= 2]
+
+    # Sem jogador multi-temporada, devolver o comparativo vazio (o scan
+    # vetorizado abaixo pressupõe ao menos uma linha)
+    if len(multi_season_data) == 0:
+        return pd.DataFrame(columns=['player_id', 'position', 'first_season',
+                                     'second_season', 'improvement', 'improvement_pct'])
+
+    # Rank denso de temporada vetorizado: ordenar por (player_id, season) e
+    # acumular inícios de temporada dentro de cada jogador — um sort + um
+    # scan em vez do rank(method='dense') por grupo
+    sorted_data = multi_season_data.sort_values(['player_id', 'season'], kind='mergesort')
+
+    pid_col = sorted_data['player_id']
+    pid = pid_col.cat.codes.to_numpy() if pid_col.dtype.name == 'category' else pid_col.to_numpy()
+    season = sorted_data['season'].to_numpy()
+
+    new_player = np.empty(len(pid), dtype=bool)
+    new_player[0] = True
+    new_player[1:] = pid[1:] != pid[:-1]
+
+    new_season = new_player.copy()
+    new_season[1:] |= season[1:] != season[:-1]
+
+    # Contagem acumulada de temporadas, zerada no início de cada jogador
+    season_starts = np.cumsum(new_season)
+    starts = np.flatnonzero(new_player)
+    sizes = np.diff(np.append(starts, len(pid)))
+    player_season_rank = season_starts - np.repeat(season_starts[starts] - 1, sizes)
+
+    # Filtrar para as duas primeiras temporadas ANTES do pivot
+    keep = player_season_rank <= 2
+
+    # Comparar primeira vs segunda temporada: ppr_mean já é a média da
+    # temporada, então basta pivotar — sem groupby adicional
+    comparison_pivot = sorted_data.loc[keep] \
+        .assign(player_season_rank=player_season_rank[keep]) \
+        .pivot(
+            index=['player_id', 'position'],
+            columns='player_season_rank',
+            values='ppr_mean'
+        ).reset_index()
+
     comparison_pivot.columns = ['player_id', 'position', 'first_season', 'second_season']
     comparison_pivot = comparison_pivot.dropna()
-    
+
     # Calcular melhoria
     comparison_pivot['improvement'] = comparison_pivot['second_season'] - comparison_pivot['first_season']
     comparison_pivot['improvement_pct'] = (comparison_pivot['improvement'] / comparison_pivot['first_season']) * 100
-    
-    fig = go.Figure()
-    
-    # Scatter plot por posição
-    for pos in ['QB', 'RB', 'WR', 'TE']:
-        pos_data = comparison_pivot[comparison_pivot['position'] == pos]
-        
-        if not pos_data.empty:
-            fig.add_trace(go.Scatter(
-                x=pos_data['first_season'],
-                y=pos_data['second_season'],
-                mode='markers',
-                name=pos,
-                marker=dict(size=8, opacity=0.7),
-                hovertemplate=f'<b>{pos}</b><br>' +
-                             'Primeira Temporada: %{x:.1f}<br>' +
-                             'Segunda Temporada: %{y:.1f}<br>' +
-                             '<extra></extra>'
-            ))
-    
-    # Linha de referência (sem melhoria)
-    max_val = max(comparison_pivot['first_season'].max(), comparison_pivot['second_season'].max())
-    fig.add_trace(go.Scatter(
-        x=[0, max_val],
-        y=[0, max_val],
-        mode='lines',
-        name='Sem Melhoria',
-        line=dict(dash='dash', color='white', width=1),
-        showlegend=False
-    ))
-    
+
+    return comparison_pivot
+
+@st.cache_resource(**_FIG_CACHE)
+def _fig_breakout_analysis(comparison_pivot: pd.DataFrame) -> go.Figure:
+    """Monta o scatter de breakout a partir do comparativo agregado"""
+
+    # px.scatter monta o trace de cada posição numa passada interna, sem o
+    # loop Python de filtro + add_trace por posição
+    fig = px.scatter(
+        comparison_pivot,
+        x='first_season',
+        y='second_season',
+        color='position',
+        category_orders={'position': ['QB', 'RB', 'WR', 'TE']},
+        opacity=0.7,
+        labels={'first_season': 'Fantasy Points PPR - Primeira Temporada',
+                'second_season': 'Fantasy Points PPR - Segunda Temporada'}
+    )
+
+    fig.update_traces(marker=dict(size=8))
+
+    # Linha de referência (sem melhoria) como shape: não entra na legenda
+    # nem adiciona um trace extra ao payload
+    max_val = np.nan_to_num(
+        comparison_pivot[['first_season', 'second_season']].to_numpy().max(initial=0.0)
+    )
+    fig.add_shape(
+        type='line',
+        x0=0, y0=0, x1=max_val, y1=max_val,
+        line=dict(dash='dash', color='white', width=1)
+    )
+
     fig.update_layout(
         title="Análise de Breakout: Primeira vs Segunda Temporada",
-        xaxis_title="Fantasy Points PPR - Primeira Temporada",
-        yaxis_title="Fantasy Points PPR - Segunda Temporada",
+        legend_title_text='',
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
         font_color='white',
         height=500
     )
-    
+
     return fig
+
+def create_breakout_analysis_chart(df: pd.DataFrame):
+    """Cria análise de jogadores breakout (segunda temporada vs primeira)"""
+
+    # Com uma temporada só não existe comparação primeira vs segunda
+    if len(df) == 0 or df['season'].nunique() < 2:
+        return _empty_fig("Análise de Breakout: Primeira vs Segunda Temporada (sem dados)")
+
+    comparison_pivot = _agg_breakout_analysis(_normalize(df))
+
+    if len(comparison_pivot) == 0:
+        return _empty_fig("Análise de Breakout: Primeira vs Segunda Temporada (sem dados)")
+
+    return _fig_breakout_analysis(comparison_pivot)